@@ -11,7 +11,6 @@ import bmesh
 import bpy
 import numpy as np
 from numpy.random import uniform
-from scipy.interpolate import interp1d
 
 from infinigen.assets.utils.decorate import (
     read_co,
@@ -21,7 +20,12 @@ from infinigen.assets.utils.decorate import (
 )
 from infinigen.assets.utils.mesh import polygon_angles
 from infinigen.assets.utils.misc import make_circular, make_circular_angle
-from infinigen.assets.utils.object import data2mesh, mesh2obj, separate_loose
+from infinigen.assets.utils.object import (
+    arrays2mesh,
+    data2mesh,
+    mesh2obj,
+    separate_loose,
+)
 from infinigen.core.nodes.node_info import Nodes
 from infinigen.core.placement.detail import sharp_remesh_with_attrs
 from infinigen.core.surface import read_attr_data
@@ -29,6 +33,8 @@ from infinigen.core.util import blender as butil
 
 
 def shape_by_angles(obj, angles, scales=None, displacements=None, method="quadratic"):
+    from scipy.interpolate import interp1d
+
     x, y, z = read_co(obj).T
     vert_angles = np.arctan2(y, x)
     if scales is not None:
@@ -45,6 +51,8 @@ def shape_by_angles(obj, angles, scales=None, displacements=None, method="quadra
 
 
 def shape_by_xs(obj, xs, displacements, method="quadratic"):
+    from scipy.interpolate import interp1d
+
     co = read_co(obj)
     f = interp1d(xs, displacements, method, bounds_error=False, fill_value=0)
     vert_displacements = f(co[:, 0])
@@ -68,10 +76,7 @@ def surface_from_func(fn, div_x=16, div_y=16, size_x=2, size_y=2):
         -1,
     )
 
-    mesh = bpy.data.meshes.new("z_function_surface")
-    mesh.from_pydata(vertices, [], faces)
-    mesh.update()
-    return mesh
+    return arrays2mesh(vertices, faces, "z_function_surface")
 
 
 def bezier_curve(anchors, vector_locations=(), resolution=None, to_mesh=True):
@@ -89,47 +94,86 @@ def bezier_curve(anchors, vector_locations=(), resolution=None, to_mesh=True):
         with butil.ViewportMode(obj, "EDIT"):
             bpy.ops.curve.subdivide(number_cuts=n - 2)
     points = obj.data.splines[0].bezier_points
-    for i in range(n):
-        points[i].co = anchors[:, i]
-    for i in range(n):
-        if i in vector_locations:
-            points[i].handle_left_type = "VECTOR"
-            points[i].handle_right_type = "VECTOR"
-        else:
-            points[i].handle_left_type = "AUTO"
-            points[i].handle_right_type = "AUTO"
+    points.foreach_set(
+        "co", np.ascontiguousarray(anchors.T, dtype=np.float32).reshape(-1)
+    )
+    # Set one at a time: writing handle types through RNA recalculates the handles,
+    # which a raw foreach_set would skip
+    vector_locations = set(vector_locations)
+    for i, p in enumerate(points):
+        handle_type = "VECTOR" if i in vector_locations else "AUTO"
+        p.handle_left_type = handle_type
+        p.handle_right_type = handle_type
     obj.data.splines[0].resolution_u = resolution if resolution is not None else 12
     if not to_mesh:
         return obj
     return curve2mesh(obj)
 
 
+def read_bezier_points(points, attr="co"):
+    arr = np.empty(len(points) * 3, dtype=np.float32)
+    points.foreach_get(attr, arr)
+    return arr.reshape(-1, 3)
+
+
+def sample_bezier(points, cuts):
+    """
+    Points along a bezier spline: each segment's start, then cuts[i] points spaced evenly
+    in t within segment i, and finally the last control point.
+    """
+    co = read_bezier_points(points).astype(float)
+    handle_left = read_bezier_points(points, "handle_left").astype(float)
+    handle_right = read_bezier_points(points, "handle_right").astype(float)
+    steps = cuts + 1
+    segment = np.repeat(np.arange(len(cuts)), steps)
+    k = np.arange(len(segment)) - np.repeat(np.cumsum(steps) - steps, steps)
+    t = (k / steps[segment])[:, np.newaxis]
+    s = 1 - t
+    samples = (
+        s**3 * co[segment]
+        + 3 * s**2 * t * handle_right[segment]
+        + 3 * s * t**2 * handle_left[segment + 1]
+        + t**3 * co[segment + 1]
+    )
+    return np.concatenate([samples, co[-1:]])
+
+
+def polyline2mesh(vertices, name=""):
+    """A mesh of vertices joined by edges in order"""
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+    n = len(vertices)
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(n)
+    mesh.vertices.foreach_set("co", vertices.reshape(-1))
+    mesh.edges.add(max(n - 1, 0))
+    edges = np.stack([np.arange(n - 1), np.arange(1, n)], -1).astype(np.int32)
+    mesh.edges.foreach_set("vertices", edges.reshape(-1))
+    mesh.update()
+    return mesh
+
+
 def curve2mesh(obj):
     points = obj.data.splines[0].bezier_points
-    cos = np.array([p.co for p in points])
+    cos = read_bezier_points(points)
     length = np.linalg.norm(cos[:-1] - cos[1:], axis=-1)
     min_length = 5e-3
-    with butil.ViewportMode(obj, "EDIT"):
-        for i in range(len(points)):
-            if points[i].handle_left_type == "FREE":
-                points[i].handle_left_type = "ALIGNED"
-            if points[i].handle_right_type == "FREE":
-                points[i].handle_right_type = "ALIGNED"
-        for i in reversed(range(len(points) - 1)):
-            points = list(obj.data.splines[0].bezier_points)
-            number_cuts = min(int(length[i] / min_length) - 1, 64)
-            if number_cuts < 0:
-                continue
-            bpy.ops.curve.select_all(action="DESELECT")
-            points[i].select_control_point = True
-            points[i + 1].select_control_point = True
-            bpy.ops.curve.subdivide(number_cuts=number_cuts)
-    obj.data.splines[0].resolution_u = 1
-    with butil.SelectObjects(obj):
-        bpy.ops.object.convert(target="MESH")
-    obj = bpy.context.active_object
-    butil.modify_mesh(obj, "WELD", merge_threshold=1e-3)
-    return obj
+    # Segments shorter than min_length are left whole; the rest are cut at least once
+    cuts = (length / min_length).astype(int) - 1
+    cuts = np.where(cuts >= 0, np.clip(cuts, 1, 64), 0)
+    # FREE handles (set by align_bezier) are sampled as they are: the edit-mode
+    # FREE -> ALIGNED pass this replaced never reached the curve data
+    # Evaluate the spline where subdividing it would put the new control points, instead
+    # of running bpy.ops.curve.subdivide and converting the result to a mesh
+    vertices = sample_bezier(points, cuts)
+    # Segments share their end points already; only merge what lies within 1e-3 of
+    # the previous sample, such as the ends of a segment shorter than that
+    step = np.linalg.norm(np.diff(vertices, axis=0), axis=-1)
+    vertices = vertices[np.concatenate([[True], step >= 1e-3])]
+    name, curve = obj.name, obj.data
+    butil.delete(obj)
+    if curve.users == 0:
+        bpy.data.curves.remove(curve)
+    return mesh2obj(polyline2mesh(vertices, name))
 
 
 def align_bezier(
@@ -141,30 +185,34 @@ def align_bezier(
         scale = np.ones(2 * len(points) - 2)
     if axes is None:
         axes = [None] * len(points)
-    scale = [1, *scale, 1]
-    for i, p in enumerate(points):
-        a = axes[i]
-        if a is None:
-            continue
-        a = np.array(a)
-        p.handle_left_type = "FREE"
-        p.handle_right_type = "FREE"
-        proj_left = np.array(p.handle_left - p.co) @ a * a
-        p.handle_left = (
-            np.array(p.co)
-            + proj_left
-            / np.linalg.norm(proj_left)
-            * np.linalg.norm(p.handle_left - p.co)
-            * scale[2 * i]
-        )
-        proj_right = np.array(p.handle_right - p.co) @ a * a
-        p.handle_right = (
-            np.array(p.co)
-            + proj_right
-            / np.linalg.norm(proj_right)
-            * np.linalg.norm(p.handle_right - p.co)
-            * scale[2 * i + 1]
-        )
+    # Columns: scale of each point's left and right handle
+    scale = np.array([1, *scale, 1], dtype=np.float32).reshape(-1, 2)
+    aligned = np.array([a is not None for a in axes])
+    if aligned.any():
+        indices = np.nonzero(aligned)[0]
+        for i in indices:
+            points[int(i)].handle_left_type = "FREE"
+            points[int(i)].handle_right_type = "FREE"
+        a = np.array([axes[i] for i in indices], dtype=np.float32)
+        c = read_bezier_points(points)[aligned]
+        handle_left = read_bezier_points(points, "handle_left")
+        handle_right = read_bezier_points(points, "handle_right")
+        for attr, handles, s in (
+            ("handle_left", handle_left, scale[aligned, 0]),
+            ("handle_right", handle_right, scale[aligned, 1]),
+        ):
+            # Project each handle onto its point's axis, keeping the handle's length
+            offset = handles[aligned] - c
+            proj = (offset * a).sum(-1, keepdims=True) * a
+            handles[aligned] = (
+                c
+                + proj
+                / np.linalg.norm(proj, axis=-1, keepdims=True)
+                * np.linalg.norm(offset, axis=-1, keepdims=True)
+                * s[:, np.newaxis]
+            )
+            points.foreach_set(attr, handles.reshape(-1))
+        obj.data.update_tag()
     if not to_mesh:
         return obj
     return curve2mesh(obj)
@@ -267,6 +315,8 @@ def cut_plane(obj, cut_center, cut_normal, clear_outer=True):
 
 
 def make_circular_interp(low, high, n, fn=uniform):
+    from scipy.interpolate import interp1d
+
     xs = make_circular_angle(polygon_angles(n))
     ys = make_circular(fn(low, high, n))
     return interp1d(xs, ys, "quadratic")
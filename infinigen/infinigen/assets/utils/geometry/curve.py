@@ -5,6 +5,7 @@
 
 
 import bpy
+import numpy as np
 
 from infinigen.core.util import blender as butil
 
@@ -51,16 +52,21 @@ class Curve:
                 )
             return x, y, z, 1
 
+        co = []
         for i, p in enumerate(self.points):
-            if i != 0:
-                polyline.points.add(1)
-            polyline.points[-1].co = get_pos(p)
+            co.append(get_pos(p))
 
             end = ((i == 0) or (i == len(self.points) - 1)) and not self.closed
             sharp = self.sharp is not None and self.sharp[i]
             if end or sharp:
-                polyline.points.add(1)
-                polyline.points[-1].co = get_pos(p)
+                co.append(co[-1])
+
+        if co:
+            # The spline starts with one point; add the rest and write them in one go
+            polyline.points.add(len(co) - 1)
+            polyline.points.foreach_set(
+                "co", np.array(co, dtype=np.float32).reshape(-1)
+            )
 
         if self.profile is not None:
             curveData.bevel_mode = "OBJECT"
@@ -138,13 +138,13 @@ def blender_nurbs(
     for i, profile in enumerate(verts_4d):
         spline = curve.splines.new(type="NURBS")
         spline.points.add(m - len(spline.points))
-        for p, co in zip(spline.points, profile):
-            p.co = co
+        spline.points.foreach_set(
+            "co", np.ascontiguousarray(profile, dtype=np.float32).reshape(-1)
+        )
 
     # bridge profiles
     for s in curve.splines:
-        for p in s.points:
-            p.select = True
+        s.points.foreach_set("select", np.ones(len(s.points), dtype=bool))
     with butil.ViewportMode(obj, mode="EDIT"):
         bpy.ops.curve.make_segment()
 
@@ -4,6 +4,8 @@
 
 # Authors: Lingjie Mei
 
+import functools
+
 import bmesh
 import bpy
 import numpy as np
@@ -17,16 +19,24 @@ from infinigen.assets.utils.decorate import (
     read_co,
     read_edges,
 )
-from infinigen.assets.utils.object import obj2trimesh, separate_loose
+from infinigen.assets.utils.object import (
+    arrays2mesh,
+    face_loops,
+    obj2trimesh,
+    separate_loose,
+)
 from infinigen.assets.utils.shapes import dissolve_limited
 from infinigen.core.util import blender as butil
 from infinigen.core.util.math import normalize
 
 
-def build_prism_mesh(n=6, r_min=1.0, r_max=1.5, height=0.3, tilt=0.3):
+def build_prism_mesh(n=6, r_min=1.0, r_max=1.5, height=0.3, tilt=0.3, rng=None):
+    # The global RNG by default, so FixedSeed keeps working; pass a
+    # np.random.Generator to draw from an independent stream instead
+    uniform = (np.random if rng is None else rng).uniform
     angles = polygon_angles(n)
-    a_upper = uniform(-np.pi / 12, np.pi / 12, n)
-    a_lower = uniform(-np.pi / 12, np.pi / 12, n)
+    # Paired draws are consecutive, so one call of size (2, n) gives the same values
+    a_upper, a_lower = uniform(-np.pi / 12, np.pi / 12, (2, n))
     z_upper = (
         1
         + uniform(-height, height, n)
@@ -37,8 +47,7 @@ def build_prism_mesh(n=6, r_min=1.0, r_max=1.5, height=0.3, tilt=0.3):
         + uniform(-height, height, n)
         + uniform(0, tilt) * np.sin(angles + uniform(-np.pi, np.pi))
     )
-    r_upper = uniform(r_min, r_max, n)
-    r_lower = uniform(r_min, r_max, n)
+    r_upper, r_lower = uniform(r_min, r_max, (2, n))
 
     vertices = np.block(
         [
@@ -58,18 +67,7 @@ def build_prism_mesh(n=6, r_min=1.0, r_max=1.5, height=0.3, tilt=0.3):
         ]
     ).T
 
-    r = np.arange(n)
-    s = np.roll(r, -1)
-    faces = np.block(
-        [
-            [r, r, r + n, s + n],
-            [s, r + n, s + n, r + n],
-            [np.full(n, 2 * n), s, s, np.full(n, 2 * n + 1)],
-        ]
-    ).T
-    mesh = bpy.data.meshes.new("prism")
-    mesh.from_pydata(vertices, [], faces)
-    mesh.update()
+    mesh = arrays2mesh(vertices, _prism_faces(n), "prism")
     return mesh
 
 
@@ -101,18 +99,7 @@ def build_convex_mesh(n=6, height=0.2, tilt=0.2):
         ]
     ).T
 
-    r = np.arange(n)
-    s = np.roll(r, -1)
-    faces = np.block(
-        [
-            [r, r, r + n, s + n],
-            [s, r + n, s + n, r + n],
-            [np.full(n, 2 * n), s, s, np.full(n, 2 * n + 1)],
-        ]
-    ).T
-    mesh = bpy.data.meshes.new("prism")
-    mesh.from_pydata(vertices, [], faces)
-    mesh.update()
+    mesh = arrays2mesh(vertices, _prism_faces(n), "prism")
     return mesh
 
 
@@ -414,6 +401,126 @@ def prepare_for_boolean(obj):
         bpy.ops.mesh.remove_doubles()
 
 
+# Face topology of the primitive builders depends only on their segment counts, so it
+# is flattened once per count and shared by every mesh built with that count
+
+
+@functools.lru_cache(maxsize=64)
+def _prism_faces(n):
+    r = np.arange(n)
+    s = np.roll(r, -1)
+    faces = np.block(
+        [
+            [r, r, r + n, s + n],
+            [s, r + n, s + n, r + n],
+            [np.full(n, 2 * n), s, s, np.full(n, 2 * n + 1)],
+        ]
+    ).T
+    return face_loops(faces)
+
+
+@functools.lru_cache(maxsize=64)
+def _cylinder_faces(segments):
+    i = np.arange(segments)
+    next_i = np.roll(i, -1)
+    # Side faces
+    sides = np.column_stack([i * 2, next_i * 2, next_i * 2 + 1, i * 2 + 1])
+    # Bottom face
+    bottom = i[::-1] * 2
+    # Top face
+    top = i * 2 + 1
+    return face_loops([*sides, bottom, top])
+
+
+@functools.lru_cache(maxsize=64)
+def _cone_faces(segments):
+    i = np.arange(segments)
+    # Side faces
+    sides = np.column_stack([np.zeros_like(i), i + 1, np.roll(i, -1) + 1])
+    # Base face
+    base = i[::-1] + 1
+    return face_loops([*sides, base])
+
+
+@functools.lru_cache(maxsize=64)
+def _sphere_faces(segments, rings):
+    r = np.arange(rings)[:, None]
+    s = np.arange(segments)
+    next_s = np.roll(s, -1)
+    quads = np.stack(
+        [
+            r * segments + s,
+            r * segments + next_s,
+            (r + 1) * segments + next_s,
+            (r + 1) * segments + s,
+        ],
+        -1,
+    )
+    # The first ring meets the pole, so its faces are triangles
+    return face_loops([*quads[0, :, :3], *quads[1:].reshape(-1, 4)])
+
+
+@functools.lru_cache(maxsize=64)
+def _torus_faces(major_segments, minor_segments):
+    i = np.arange(major_segments)[:, None]
+    j = np.arange(minor_segments)
+    next_i = np.roll(i, -1)
+    next_j = np.roll(j, -1)
+    faces = np.stack(
+        [
+            i * minor_segments + j,
+            next_i * minor_segments + j,
+            next_i * minor_segments + next_j,
+            i * minor_segments + next_j,
+        ],
+        -1,
+    ).reshape(-1, 4)
+    return face_loops(faces)
+
+
+@functools.lru_cache(maxsize=64)
+def _unit_circle(segments):
+    """cos and sin of `segments` evenly spaced angles from 0, computed once per count"""
+    angles = 2 * np.pi * np.arange(segments) / segments
+    cos, sin = np.cos(angles), np.sin(angles)
+    cos.setflags(write=False)
+    sin.setflags(write=False)
+    return cos, sin
+
+
+_BOX_FACES = face_loops(
+    np.array(
+        [
+            [0, 1, 2, 3],
+            [4, 5, 6, 7],
+            [0, 1, 5, 4],
+            [2, 3, 7, 6],
+            [1, 2, 6, 5],
+            [0, 3, 7, 4],
+        ]
+    )
+)
+_PLANE_FACES = face_loops(np.array([[0, 1, 2, 3]]))
+# Unit box and plane corners, scaled to size per call
+_BOX_VERTS = (
+    np.array(
+        [
+            [-1, -1, -1],
+            [1, -1, -1],
+            [1, 1, -1],
+            [-1, 1, -1],
+            [-1, -1, 1],
+            [1, -1, 1],
+            [1, 1, 1],
+            [-1, 1, 1],
+        ],
+        dtype=np.float32,
+    )
+    * 0.5
+)
+_PLANE_VERTS = _BOX_VERTS[:4] * np.array([1, 1, 0], dtype=np.float32)
+
+
 def build_cylinder_mesh(radius=1.0, height=2.0, segments=32):
     """
     Create a cylinder mesh.
@@ -436,29 +543,14 @@ def build_cylinder_mesh(radius=1.0, height=2.0, segments=32):
     -------
     mesh = build_cylinder_mesh(radius=0.5, height=1.5, segments=24)
     """
-    import bpy
-    from math import pi, cos, sin
-    verts = []
-    faces = []
-    for i in range(segments):
-        angle = 2 * pi * i / segments
-        x = radius * cos(angle)
-        y = radius * sin(angle)
-        verts.append((x, y, -height / 2))
-        verts.append((x, y, height / 2))
-    # Side faces
-    for i in range(segments):
-        next_i = (i + 1) % segments
-        faces.append([i * 2, next_i * 2, next_i * 2 + 1, i * 2 + 1])
-    # Bottom face
-    bottom = [i * 2 for i in range(segments)]
-    faces.append(bottom[::-1])
-    # Top face
-    top = [i * 2 + 1 for i in range(segments)]
-    faces.append(top)
-    mesh = bpy.data.meshes.new("cylinder")
-    mesh.from_pydata(verts, [], faces)
-    mesh.update()
+    cos, sin = _unit_circle(segments)
+    # Bottom ring at even indices, top ring at odd indices
+    verts = np.empty((2 * segments, 3), dtype=np.float32)
+    verts[:, 0] = np.repeat(radius * cos, 2)
+    verts[:, 1] = np.repeat(radius * sin, 2)
+    verts[0::2, 2] = -height / 2
+    verts[1::2, 2] = height / 2
+    mesh = arrays2mesh(verts, _cylinder_faces(segments), "cylinder")
     return mesh
 
 
@@ -484,22 +576,13 @@ def build_cone_mesh(radius=1.0, height=2.0, segments=32):
     -------
     mesh = build_cone_mesh(radius=1.0, height=2.0, segments=32)
     """
-    import bpy
-    from math import pi, cos, sin
-    verts = [(0, 0, height / 2)]  # tip
-    for i in range(segments):
-        angle = 2 * pi * i / segments
-        x = radius * cos(angle)
-        y = radius * sin(angle)
-        verts.append((x, y, -height / 2))
-    # Side faces
-    faces = [[0, i + 1, ((i + 1) % segments) + 1] for i in range(segments)]
-    # Base face
-    base = [i + 1 for i in range(segments)]
-    faces.append(base[::-1])
-    mesh = bpy.data.meshes.new("cone")
-    mesh.from_pydata(verts, [], faces)
-    mesh.update()
+    cos, sin = _unit_circle(segments)
+    verts = np.empty((segments + 1, 3), dtype=np.float32)
+    verts[0] = 0, 0, height / 2  # tip
+    verts[1:, 0] = radius * cos
+    verts[1:, 1] = radius * sin
+    verts[1:, 2] = -height / 2
+    mesh = arrays2mesh(verts, _cone_faces(segments), "cone")
     return mesh
 
 
@@ -525,32 +608,15 @@ def build_sphere_mesh(radius=1.0, segments=32, rings=16):
     -------
     mesh = build_sphere_mesh(radius=1.0, segments=32, rings=16)
     """
-    import bpy
-    from math import pi, sin, cos
-    verts = []
-    faces = []
-    for r in range(rings + 1):
-        phi = pi * r / rings
-        for s in range(segments):
-            theta = 2 * pi * s / segments
-            x = radius * sin(phi) * cos(theta)
-            y = radius * sin(phi) * sin(theta)
-            z = radius * cos(phi)
-            verts.append((x, y, z))
-    for r in range(rings):
-        for s in range(segments):
-            next_s = (s + 1) % segments
-            a = r * segments + s
-            b = r * segments + next_s
-            c = (r + 1) * segments + next_s
-            d = (r + 1) * segments + s
-            if r != 0:
-                faces.append([a, b, c, d])
-            else:
-                faces.append([a, b, c])
-    mesh = bpy.data.meshes.new("sphere")
-    mesh.from_pydata(verts, [], faces)
-    mesh.update()
+    # Latitudes pole to pole are the first half of a circle of 2 * rings steps
+    cos_phi, sin_phi = (a[: rings + 1] for a in _unit_circle(2 * rings))
+    cos_theta, sin_theta = _unit_circle(segments)
+    # One row of `segments` vertices per ring, pole to pole
+    verts = np.empty((rings + 1, segments, 3), dtype=np.float32)
+    verts[..., 0] = radius * np.outer(sin_phi, cos_theta)
+    verts[..., 1] = radius * np.outer(sin_phi, sin_theta)
+    verts[..., 2] = radius * cos_phi[:, None]
+    mesh = arrays2mesh(verts, _sphere_faces(segments, rings), "sphere")
     return mesh
 
 
@@ -578,30 +644,15 @@ def build_torus_mesh(major_radius=1.0, minor_radius=0.25, major_segments=32, min
     -------
     mesh = build_torus_mesh(major_radius=1.0, minor_radius=0.25, major_segments=32, minor_segments=16)
     """
-    import bpy
-    from math import pi, cos, sin
-    verts = []
-    faces = []
-    for i in range(major_segments):
-        theta = 2 * pi * i / major_segments
-        for j in range(minor_segments):
-            phi = 2 * pi * j / minor_segments
-            x = (major_radius + minor_radius * cos(phi)) * cos(theta)
-            y = (major_radius + minor_radius * cos(phi)) * sin(theta)
-            z = minor_radius * sin(phi)
-            verts.append((x, y, z))
-    for i in range(major_segments):
-        for j in range(minor_segments):
-            next_i = (i + 1) % major_segments
-            next_j = (j + 1) % minor_segments
-            a = i * minor_segments + j
-            b = next_i * minor_segments + j
-            c = next_i * minor_segments + next_j
-            d = i * minor_segments + next_j
-            faces.append([a, b, c, d])
-    mesh = bpy.data.meshes.new("torus")
-    mesh.from_pydata(verts, [], faces)
-    mesh.update()
+    cos_theta, sin_theta = _unit_circle(major_segments)
+    cos_phi, sin_phi = _unit_circle(minor_segments)
+    # One row of `minor_segments` vertices per step around the main ring
+    ring = major_radius + minor_radius * cos_phi
+    verts = np.empty((major_segments, minor_segments, 3), dtype=np.float32)
+    verts[..., 0] = np.outer(cos_theta, ring)
+    verts[..., 1] = np.outer(sin_theta, ring)
+    verts[..., 2] = minor_radius * sin_phi
+    mesh = arrays2mesh(verts, _torus_faces(major_segments, minor_segments), "torus")
     return mesh
 
 
@@ -627,19 +678,8 @@ def build_box_mesh(width=1.0, depth=1.0, height=1.0):
     -------
     mesh = build_box_mesh(width=1.0, depth=2.0, height=0.5)
     """
-    import bpy
-    w, d, h = width / 2, depth / 2, height / 2
-    verts = [
-        (-w, -d, -h), (w, -d, -h), (w, d, -h), (-w, d, -h),
-        (-w, -d, h), (w, -d, h), (w, d, h), (-w, d, h)
-    ]
-    faces = [
-        [0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 5, 4],
-        [2, 3, 7, 6], [1, 2, 6, 5], [0, 3, 7, 4]
-    ]
-    mesh = bpy.data.meshes.new("box")
-    mesh.from_pydata(verts, [], faces)
-    mesh.update()
+    verts = _BOX_VERTS * np.array([width, depth, height], dtype=np.float32)
+    mesh = arrays2mesh(verts, _BOX_FACES, "box")
     return mesh
 
 
@@ -663,11 +703,6 @@ def build_plane_mesh(width=1.0, depth=1.0):
     -------
     mesh = build_plane_mesh(width=2.0, depth=2.0)
     """
-    import bpy
-    w, d = width / 2, depth / 2
-    verts = [(-w, -d, 0), (w, -d, 0), (w, d, 0), (-w, d, 0)]
-    faces = [[0, 1, 2, 3]]
-    mesh = bpy.data.meshes.new("plane")
-    mesh.from_pydata(verts, [], faces)
-    mesh.update()
+    verts = _PLANE_VERTS * np.array([width, depth, 1], dtype=np.float32)
+    mesh = arrays2mesh(verts, _PLANE_FACES, "plane")
     return mesh
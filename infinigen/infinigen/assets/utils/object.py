@@ -4,6 +4,8 @@
 
 # Authors: Lingjie Mei
 
+import itertools
+from typing import NamedTuple
 
 import bpy
 import numpy as np
@@ -59,6 +61,59 @@ def data2mesh(vertices=(), edges=(), faces=(), name=""):
     return mesh
 
 
+class FaceLoops(NamedTuple):
+    """A mesh's face topology in the flat layout Blender stores it in"""
+
+    loop_start: np.ndarray
+    loop_total: np.ndarray
+    vertex_index: np.ndarray
+
+
+def face_loops(faces):
+    """
+    Flatten faces, given as an (n, k) index array or a sequence of index sequences,
+    into read-only int32 FaceLoops, e.g. to cache the topology shared by many meshes.
+    """
+    if isinstance(faces, np.ndarray):
+        loop_total = np.full(len(faces), faces.shape[-1], dtype=np.int32)
+        vertex_index = np.ascontiguousarray(faces, dtype=np.int32).reshape(-1)
+    else:
+        loop_total = np.fromiter(map(len, faces), dtype=np.int32, count=len(faces))
+        vertex_index = np.fromiter(
+            itertools.chain.from_iterable(faces), dtype=np.int32, count=loop_total.sum()
+        )
+    loop_start = np.zeros_like(loop_total)
+    np.cumsum(loop_total[:-1], dtype=np.int32, out=loop_start[1:])
+    loops = FaceLoops(loop_start, loop_total, vertex_index)
+    for arr in loops:
+        arr.setflags(write=False)
+    return loops
+
+
+def arrays2mesh(vertices, faces, name=""):
+    """
+    Like data2mesh, but fills the mesh with bulk foreach_set calls instead of from_pydata's
+    per-element conversion. faces is anything face_loops accepts, or its FaceLoops result.
+    """
+    # Blender stores positions as C floats: hand foreach_set a matching buffer so it
+    # can copy it in one go instead of converting element by element
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+    loops = faces if isinstance(faces, FaceLoops) else face_loops(faces)
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set("co", vertices.reshape(-1))
+    mesh.loops.add(len(loops.vertex_index))
+    mesh.loops.foreach_set("vertex_index", loops.vertex_index)
+    mesh.polygons.add(len(loops.loop_total))
+    mesh.polygons.foreach_set("loop_start", loops.loop_start)
+    if bpy.app.version < (4, 0, 0):
+        # Derived from loop_start (and read-only) from Blender 4.0 on
+        mesh.polygons.foreach_set("loop_total", loops.loop_total)
+    mesh.update(calc_edges=True)
+    return mesh
+
+
 def mesh2obj(mesh):
     obj = bpy.data.objects.new(mesh.name, mesh)
     bpy.context.scene.collection.objects.link(obj)
@@ -9,7 +9,14 @@ from shapely import Polygon, remove_repeated_points, simplify
 from shapely.ops import linemerge, orient, polygonize, shared_paths, unary_union
 from trimesh.creation import triangulate_polygon
 
-from infinigen.assets.utils.decorate import read_co, read_normal, select_faces, write_co
+from infinigen.assets.utils.decorate import (
+    read_co,
+    read_loop_starts,
+    read_loop_vertices,
+    read_normal,
+    select_faces,
+    write_co,
+)
 from infinigen.assets.utils.object import data2mesh, join_objects, mesh2obj, new_circle
 from infinigen.core.util import blender as butil
 
@@ -115,11 +122,10 @@ def dissolve_limited(obj):
 
 def obj2polygon(obj):
     co = read_co(obj)[:, :2]
+    # Split the flat loop buffer per face instead of copying each polygon's vertices
+    faces = np.split(read_loop_vertices(obj), read_loop_starts(obj)[1:])
     p = shapely.union_all(
-        [
-            shapely.make_valid(orient(shapely.Polygon(co[p.vertices])))
-            for p in obj.data.polygons
-        ]
+        [shapely.make_valid(orient(shapely.Polygon(co[f]))) for f in faces]
     )
     return shapely.ops.orient(shapely.make_valid(shapely.simplify(p, 1e-6)))
 
@@ -0,0 +1,55 @@
+import functools
+import hashlib
+import logging
+from pathlib import Path
+from typing import Callable
+
+from . import _json
+
+logger = logging.getLogger(__name__)
+
+# Content-addressed cache of LLM results, one JSON file per request
+CACHE_DIR = Path.home() / ".cache" / "primitive_builder"
+
+_enabled = True
+
+def set_enabled(enabled: bool) -> None:
+    """Turn the cache on or off for the whole process (used by --no-cache)"""
+    global _enabled
+    _enabled = enabled
+
+def is_enabled() -> bool:
+    return _enabled
+
+def normalize(prompt: str) -> str:
+    """Lowercase and collapse whitespace so trivially different prompts share an entry"""
+    return " ".join(prompt.lower().split())
+
+def cached(namespace: str, key: Callable[..., str]):
+    """
+    Cache a function's JSON-serialisable result on disk under sha256(key(*args, **kwargs)).
+    Exceptions are not cached, so failed requests are retried on the next call.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+
+            digest = hashlib.sha256(key(*args, **kwargs).encode()).hexdigest()
+            path = CACHE_DIR / namespace / f"{digest}.json"
+            try:
+                return _json.loads(path.read_bytes())
+            except (FileNotFoundError, _json.JSONDecodeError):
+                pass
+
+            result = fn(*args, **kwargs)
+            # An unwritable cache must not cost us the result we just paid for
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                _json.dump(result, path)
+            except OSError as e:
+                logger.warning("Could not write cache entry %s: %s", path, e)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,19 @@
+import functools
+import importlib.util
+
+import httpx
+import openai
+
+
+@functools.lru_cache(maxsize=None)
+def shared_client(api_key: str) -> openai.OpenAI:
+    """
+    One OpenAI client per API key for the whole process, so every agent reuses the
+    same pooled keep-alive connections (multiplexed over HTTP/2 when h2 is installed)
+    instead of each paying its own TCP + TLS handshake.
+    """
+    http_client = httpx.Client(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+    )
+    return openai.OpenAI(api_key=api_key, http_client=http_client)
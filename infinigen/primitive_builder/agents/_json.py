@@ -0,0 +1,70 @@
+import contextlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator, Union
+
+# orjson is optional: it parses/serialises LLM payloads several times faster
+# than the stdlib, but everything still works with plain json when it is missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses this, so callers can keep catching json.JSONDecodeError
+JSONDecodeError = json.JSONDecodeError
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Serialise to str; indent=True gives 2-space indentation"""
+    return _dumpb(obj, indent).decode()
+
+def _dumpb(obj: Any, indent: bool = False) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+@contextlib.contextmanager
+def _atomic_open(path: Union[str, Path]) -> Iterator[BinaryIO]:
+    """
+    Open a temporary file next to path for writing and move it over path on success,
+    so readers never see a half-written file. On error path is left untouched.
+    """
+    # Unique per process and thread; opened normally so the file gets the usual permissions
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        # The temporary file may never have been created (e.g. a missing directory)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+def dump(obj: Any, path: Union[str, Path], indent: bool = False) -> None:
+    """Atomically write obj to path as JSON in a single write, replacing any existing file"""
+    payload = _dumpb(obj, indent)
+    with _atomic_open(path) as f:
+        f.write(payload)
+
+def dump_iter(items: Iterable[Any], path: Union[str, Path]) -> None:
+    """
+    Atomically write items to path as a compact JSON array, serialising one element at
+    a time so the whole document is never held in memory as a single string.
+    If producing an item fails, the existing file (if any) is left as it was.
+    """
+    with _atomic_open(path) as f:
+        f.write(b"[")
+        for i, item in enumerate(items):
+            if i:
+                f.write(b",\n")
+            f.write(_dumpb(item))
+        f.write(b"]\n")
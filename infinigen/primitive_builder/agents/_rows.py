@@ -0,0 +1,32 @@
+from typing import Any, List
+
+from . import _json
+
+# Appended to an agent's system prompt when several inputs share one request
+ROWS_INSTRUCTIONS = """
+You will receive several numbered rows. Handle every row independently, exactly as described above.
+Respond with a JSON object of the form {"rows": [...]} holding exactly one element per input row:
+{"row": <row number>, "result": <the JSON object you would have returned for that row alone>}
+""".strip()
+
+def format_rows(items: List[str]) -> str:
+    """Number the inputs 1..n, one per line, for a row-marshaled request"""
+    return "Rows:\n" + "\n".join(f"{i}) {item}" for i, item in enumerate(items, 1))
+
+def split_rows(content: str, n_rows: int) -> List[Any]:
+    """
+    Return the per-row results of a row-marshaled response, in row order.
+    Raises ValueError (or a JSONDecodeError) if the response does not cover every row.
+    """
+    result = _json.loads(content)
+    if not isinstance(result, dict):
+        raise ValueError(f"Expected a 'rows' JSON object, but got {type(result)}")
+    by_row = {
+        row["row"]: row.get("result")
+        for row in result.get("rows", [])
+        if isinstance(row, dict) and "row" in row
+    }
+    missing = [i for i in range(1, n_rows + 1) if i not in by_row]
+    if missing:
+        raise ValueError(f"Batch response is missing rows {missing}")
+    return [by_row[i] for i in range(1, n_rows + 1)]
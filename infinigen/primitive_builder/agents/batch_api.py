@@ -0,0 +1,84 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict
+
+from . import _json
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+def _load_state(state_path: Path) -> Dict[str, str]:
+    if state_path.exists():
+        return _json.loads(state_path.read_bytes())
+    return {}
+
+def _save_state(state_path: Path, state: Dict[str, str]) -> None:
+    state_path.write_text(json.dumps(state, indent=2))
+
+def run_batch(client, requests: Dict[str, Dict], jsonl_path: Path, poll_interval: float = 30.0) -> Dict[str, str]:
+    """
+    Run chat-completion requests through the OpenAI Batch API and wait for them to finish.
+    `requests` maps custom_id -> request body. Returns custom_id -> message content for
+    every request that succeeded.
+    The batch id is recorded in `.batch_state.json` next to `jsonl_path`, so rerunning
+    with the same requests after an interruption resumes the batch instead of resubmitting.
+    """
+    jsonl_path = Path(jsonl_path).expanduser().resolve()
+    jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path = jsonl_path.parent / ".batch_state.json"
+
+    lines = [
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body})
+        for custom_id, body in requests.items()
+    ]
+    key = hashlib.sha256("\n".join(lines).encode()).hexdigest()[:16]
+
+    state = _load_state(state_path)
+    batch_id = state.get(key)
+    if batch_id:
+        print(f"Resuming batch {batch_id}")
+    else:
+        jsonl_path.write_text("\n".join(lines) + "\n")
+        with open(jsonl_path, "rb") as f:
+            input_file = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        batch_id = batch.id
+        state[key] = batch_id
+        _save_state(state_path, state)
+        print(f"Submitted batch {batch_id} with {len(lines)} requests")
+
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in TERMINAL_STATUSES:
+            break
+        counts = batch.request_counts
+        if counts:
+            print(f"Batch {batch_id}: {batch.status} ({counts.completed}/{counts.total} done)")
+        else:
+            print(f"Batch {batch_id}: {batch.status}")
+        time.sleep(poll_interval)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch_id} ended with status '{batch.status}'")
+
+    results = {}
+    # Parse the raw bytes line by line; no decoded copy of the whole output file
+    for line in client.files.content(batch.output_file_id).content.splitlines():
+        if not line.strip():
+            continue
+        row = _json.loads(line)
+        response = row.get("response") or {}
+        if response.get("status_code") != 200:
+            print(f"Warning: request {row.get('custom_id')} failed: {row.get('error')}")
+            continue
+        results[row["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+
+    # The batch is finished, so a rerun should submit a fresh one
+    state.pop(key, None)
+    _save_state(state_path, state)
+    return results
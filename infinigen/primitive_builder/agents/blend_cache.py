@@ -0,0 +1,72 @@
+import hashlib
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+def _pipeline_version() -> str:
+    """
+    Hash the package sources: prompts, the generators and the Blender worker all live
+    here, so editing any of them retires every cached output instead of relying on a
+    hand-bumped constant.
+    """
+    root = Path(__file__).resolve().parent.parent
+    digest = hashlib.sha256()
+    for path in sorted([*root.glob("*.py"), *root.glob("agents/*.py")]):
+        digest.update(path.relative_to(root).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+PIPELINE_VERSION = _pipeline_version()
+MAX_AGE_SECONDS = 24 * 60 * 60
+
+def cache_key(pipeline: str, prompt: str, output_path: Optional[str], *options) -> str:
+    """
+    Hash the inputs that fully determine a pipeline run. `options` are the generator
+    settings that change its output or steps, such as the model and mode flags.
+    """
+    key = "\0".join([pipeline, prompt, str(output_path), *map(str, options), PIPELINE_VERSION])
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+def _cache_paths(json_path: Path, key: str) -> Tuple[Path, Path]:
+    cache_dir = json_path.parent / ".cache"
+    return cache_dir / f"{key}.json", cache_dir / f"{key}.blend"
+
+def _link(src: Path, dst: Path) -> None:
+    """Hardlink src to dst, falling back to a copy across filesystems"""
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def lookup(json_path: Path, key: str) -> Optional[Tuple[Path, Path]]:
+    """Return (json_path, blend_path) if a recent run with this key is cached, else None"""
+    cached_json, cached_blend = _cache_paths(json_path, key)
+    try:
+        age = time.time() - cached_blend.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    if age > MAX_AGE_SECONDS or not cached_json.exists():
+        return None
+
+    # Restore the outputs at the requested location; another prompt may have overwritten them
+    blend_path = json_path.with_suffix(".blend")
+    shutil.copy2(cached_json, json_path)
+    _link(cached_blend, blend_path)
+    return json_path, blend_path
+
+def store(json_path: Path, blend_path: Path, key: str) -> None:
+    """Store a successful run's outputs in the cache"""
+    cached_json, cached_blend = _cache_paths(json_path, key)
+    try:
+        cached_json.parent.mkdir(parents=True, exist_ok=True)
+        # The JSON is rewritten in place on the next run, so it must be a real copy;
+        # Blender saves via rename, so the .blend can safely be hardlinked
+        shutil.copy2(json_path, cached_json)
+        _link(blend_path, cached_blend)
+    except OSError as e:
+        print(f"Warning: could not cache outputs: {e}")
@@ -1,8 +1,11 @@
+import contextlib
 import bpy
 import numpy as np
 from pathlib import Path
 from typing import Dict, List, Optional
 import json
+import uuid
+from functools import lru_cache
 from infinigen.assets.utils import draw, mesh, object
 from infinigen.core import surface
 import importlib
@@ -12,6 +15,52 @@ from infinigen.core.nodes.node_wrangler import NodeWrangler, Nodes
 from infinigen.assets.utils.decorate import solidify
 import mathutils
 
+# Modules that a spec's 'module.function' operation names may refer to
+_OPERATION_MODULES = {'draw': draw, 'mesh': mesh, 'object': object, 'surface': surface}
+
+@lru_cache(maxsize=None)
+def _resolve_operation(operation: str):
+    """
+    Look up the function for an operation name such as 'mesh.build_box_mesh', or the
+    operator for a 'bpy.ops.<category>.<name>' one. Raises KeyError/AttributeError if unknown.
+    """
+    if operation.startswith('bpy.ops.'):
+        _, _, category, name = operation.split('.')
+        return getattr(getattr(bpy.ops, category), name)
+    module_name, _, func_name = operation.partition('.')
+    return getattr(_OPERATION_MODULES[module_name], func_name)
+
+@lru_cache(maxsize=128)
+def _material_module(module_path: str):
+    """
+    Import a material module once, however many objects use it. Returns None (also
+    cached) if it cannot be imported, so a bad path is only tried and reported once.
+    """
+    try:
+        return import_module(module_path)
+    except ImportError as e:
+        print(f"✗ Failed to import material module {module_path}: {e}")
+        return None
+
+@contextlib.contextmanager
+def _undo_disabled():
+    """Skip the undo step every operator would push; nothing built here is ever undone"""
+    edit = bpy.context.preferences.edit
+    use_global_undo = edit.use_global_undo
+    edit.use_global_undo = False
+    try:
+        yield
+    finally:
+        edit.use_global_undo = use_global_undo
+
+def _as_object(result, name: str):
+    """Return a builder's result as a scene object, wrapping a bare mesh in a new linked object"""
+    if isinstance(result, bpy.types.Object):
+        return result
+    obj = bpy.data.objects.new(name, result)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
 def apply_material(obj, material_info):
     """Apply material using the module's apply() function"""
     try:
@@ -19,8 +68,10 @@ def apply_material(obj, material_info):
         module_path = material_info['path']
         print(f"Importing material from: {module_path}")
         
-        # Import module
-        module = import_module(module_path)
+        # Import module (cached per distinct path)
+        module = _material_module(module_path)
+        if module is None:
+            return
         
         # Call the module's apply() function with parameters
         module.apply(
@@ -65,12 +116,23 @@ class BlenderGenerator:
         return [self.sample_distribution(dist_spec) for _ in range(3)]
             
     def create_file(self, components: List[Dict], custom_path: Optional[str] = None) -> str:
+        with _undo_disabled():
+            return self._create_file(components, custom_path)
+
+    def _create_file(self, components: List[Dict], custom_path: Optional[str]) -> str:
         print("\n=== Starting Blender File Creation ===")
         print(f"Received {len(components)} components")
         
-        # Clear scene
-        bpy.ops.object.select_all(action='SELECT')
-        bpy.ops.object.delete()
+        # Clear scene through the data API: no operator, selection walk or undo step.
+        # batch_remove unlinks everything in one pass instead of one pass per object
+        bpy.data.batch_remove(list(bpy.data.objects))
+        # Data left without users, here or by earlier files built in this process
+        bpy.data.batch_remove([
+            data
+            for collection in (bpy.data.meshes, bpy.data.curves, bpy.data.cameras, bpy.data.lights)
+            for data in collection
+            if data.users == 0
+        ])
         print("Scene cleared")
         
         all_objects = []
@@ -93,33 +155,15 @@ class BlenderGenerator:
                 try:
                     if operation.startswith('bpy.ops'):
                         # Handle Blender operators
-                        eval(operation)(**params)
+                        _resolve_operation(operation)(**params)
                         continue
                     else:
-                        module_name, func_name = operation.split('.')
-                        if module_name == 'draw':
-                            module = draw
-                        elif module_name == 'mesh':
-                            module = mesh
-                        elif module_name == 'object':
-                            module = object
-                        elif module_name == 'surface':
-                            module = surface
-                            
-                        func = getattr(module, func_name)
+                        func = _resolve_operation(operation)
                         
                         if operation == 'draw.bezier_curve':
-                            result = func(**params)
-                            if isinstance(result, bpy.types.Object):
-                                current_obj = result
-                                solidify(current_obj, 2, thickness=0.04)
-                                component_objects.append(result)
-                            else:
-                                mesh_obj = bpy.data.objects.new(component_name, result)
-                                bpy.context.scene.collection.objects.link(mesh_obj)
-                                current_obj = mesh_obj
-                                solidify(current_obj, 2, thickness=0.04)
-                                component_objects.append(mesh_obj)
+                            current_obj = _as_object(func(**params), component_name)
+                            solidify(current_obj, 2, thickness=0.04)
+                            component_objects.append(current_obj)
                         
                         elif operation == 'surface.add_geomod':
                             if current_obj is None:
@@ -138,18 +182,10 @@ class BlenderGenerator:
                                 })
                                 return curve_with_profile
                                 
-                            result = func(current_obj, geo_radius, input_args=params['input_args'])
+                            func(current_obj, geo_radius, input_args=params['input_args'])
                         else:
-                            result = func(**params)
-                            
-                            if isinstance(result, bpy.types.Object):
-                                current_obj = result
-                                component_objects.append(result)
-                            else:
-                                mesh_obj = bpy.data.objects.new(component_name, result)
-                                bpy.context.scene.collection.objects.link(mesh_obj)
-                                current_obj = mesh_obj
-                                component_objects.append(mesh_obj)
+                            current_obj = _as_object(func(**params), component_name)
+                            component_objects.append(current_obj)
                         
                         # Apply transforms if this operation created a new object
                         if transform and current_obj and operation != 'surface.add_geomod':
@@ -159,22 +195,25 @@ class BlenderGenerator:
                                 current_obj.rotation_euler = transform['rotation']
                             if 'scale' in transform:
                                 current_obj.scale = transform['scale']
-                        
-                        # Apply material if specified
-                        if 'material' in component and current_obj:
-                            apply_material(current_obj, component['material'])
                     
                 except Exception as e:
                     print(f"Error in operation {operation}: {str(e)}")
                     continue
             
+            # Apply the component's material once per object, after all its operations,
+            # rather than again after every operation that touched it
+            if 'material' in component:
+                for obj in component_objects:
+                    apply_material(obj, component['material'])
+            
             # Join all objects for this component
             if len(component_objects) > 1:
-                bpy.ops.object.select_all(action='DESELECT')
-                for obj in component_objects:
-                    obj.select_set(True)
-                bpy.context.view_layer.objects.active = component_objects[0]
-                bpy.ops.object.join()
+                # Hand the join its objects directly instead of rewriting the selection
+                with bpy.context.temp_override(
+                    active_object=component_objects[0],
+                    selected_editable_objects=component_objects
+                ):
+                    bpy.ops.object.join()
                 all_objects.append(component_objects[0])
             elif component_objects:
                 all_objects.append(component_objects[0])
@@ -187,10 +226,17 @@ class BlenderGenerator:
             output_path = Path(custom_path).expanduser()
             output_path.parent.mkdir(parents=True, exist_ok=True)
         else:
-            output_path = self.output_dir / "generated_object.blend"
+            output_path = self.output_dir / f"generated_object_{uuid.uuid4().hex[:8]}.blend"
         
         print(f"Saving to: {output_path}")
-        bpy.ops.wm.save_as_mainfile(filepath=str(output_path))
+        # Uncompressed and without remapping paths: compression costs seconds per
+        # hundred MB on save, and the generated scene has no relative paths to fix up
+        bpy.ops.wm.save_as_mainfile(
+            filepath=str(output_path),
+            compress=False,
+            relative_remap=False,
+            check_existing=False
+        )
         return str(output_path)
 
     def _setup_camera_and_lighting(self, objects):
@@ -198,19 +244,20 @@ class BlenderGenerator:
         if not objects:
             return
         
-        # Create camera
-        bpy.ops.object.camera_add()
-        camera = bpy.context.active_object
-        
-        # Get bounds of all objects
-        bounds_min = np.array([float('inf')] * 3)
-        bounds_max = np.array([float('-inf')] * 3)
+        # Create camera through the data API rather than the camera_add operator
+        camera = bpy.data.objects.new("Camera", bpy.data.cameras.new("Camera"))
+        bpy.context.scene.collection.objects.link(camera)
         
+        # Get bounds of all objects. One view-layer update brings every object's
+        # matrix_world up to date with the transforms set while building
+        bpy.context.view_layer.update()
+        corners = []
         for obj in objects:
-            for point in obj.bound_box:
-                world_point = obj.matrix_world @ mathutils.Vector(point)
-                bounds_min = np.minimum(bounds_min, np.array(world_point))
-                bounds_max = np.maximum(bounds_max, np.array(world_point))
+            matrix = np.array(obj.matrix_world)
+            corners.append(np.array(obj.bound_box) @ matrix[:3, :3].T + matrix[:3, 3])
+        corners = np.concatenate(corners)
+        bounds_min = corners.min(axis=0)
+        bounds_max = corners.max(axis=0)
         
         # Calculate center and size
         center = (bounds_max + bounds_min) / 2
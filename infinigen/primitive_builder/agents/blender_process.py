@@ -0,0 +1,191 @@
+import contextlib
+import functools
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# Runs inside Blender; see that file for the stdin/stdout protocol
+WORKER_SCRIPT = Path(__file__).resolve().parent.parent / "blender_worker.py"
+# Must match blender_worker.DONE_MARKER
+DONE_MARKER = "BLENDER_WORKER_DONE"
+
+# Common Blender installation locations, keyed by platform
+_BLENDER_CANDIDATES = {
+    "darwin": [
+        "/Applications/Blender.app/Contents/MacOS/Blender",
+    ],
+    "linux": [
+        "/usr/bin/blender",
+        "/usr/local/bin/blender",
+    ],
+    "win32": [
+        "C:/Program Files/Blender Foundation/Blender 3.x/blender.exe",
+        "C:/Program Files/Blender Foundation/Blender 4.x/blender.exe",
+    ],
+}.get("win32" if sys.platform.startswith("win") else sys.platform, [])
+
+@functools.lru_cache(maxsize=1)
+def find_blender() -> Optional[Path]:
+    """
+    Find a Blender executable on the system. Check PATH first, then common install paths.
+    Return None if not found. The result is cached for the life of the process.
+    """
+    # Check if `blender` is on PATH
+    blender_path = shutil.which("blender")
+    if blender_path:
+        return Path(blender_path)
+
+    # Common installation locations for this platform only
+    for p in _BLENDER_CANDIDATES:
+        if os.path.isfile(p):
+            return Path(p)
+
+    return None
+
+class BlenderWorker:
+    """
+    A long-lived `blender --background` process that converts JSON specs with
+    `script_path`, so Blender's startup and bpy import are paid once instead of once
+    per spec. Safe to share between threads; jobs run one at a time.
+    """
+
+    def __init__(self, blender_path: Path, script_path: Path):
+        self.blender_path = blender_path
+        self.script_path = script_path
+        self._proc = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Launch the process unless it is already running (returns immediately)"""
+        with self._lock:
+            self._start()
+
+    def _start(self) -> None:
+        if self._proc is not None and self._proc.poll() is None:
+            return
+        cmd = [
+            str(self.blender_path),
+            "--background",
+            "--python", str(WORKER_SCRIPT),
+            "--", str(self.script_path)
+        ]
+        self._proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, bufsize=1
+        )
+
+    def run(self, json_path: Path) -> Tuple[Optional[int], deque]:
+        """
+        Convert `json_path`, starting the process on first use. Blender's output is
+        echoed live. Returns (returncode, output_tail); returncode is None if the worker
+        died, in which case the caller should fall back to a one-off Blender process.
+        """
+        tail = deque(maxlen=200)
+        with self._lock:
+            self._start()
+            try:
+                self._proc.stdin.write(f"{json_path}\n")
+                self._proc.stdin.flush()
+            except BrokenPipeError:
+                self._proc = None
+                return None, tail
+
+            for line in self._proc.stdout:
+                if line.startswith(DONE_MARKER):
+                    return int(line.split(maxsplit=2)[1]), tail
+                sys.stdout.write(line)
+                tail.append(line)
+
+            # The worker exited before finishing this job
+            print("WARNING: Blender worker exited unexpectedly. Last lines of output:")
+            print("".join(tail))
+            self._proc = None
+            return None, tail
+
+    def close(self) -> None:
+        """Let the process finish its loop and exit; kill it if it does not"""
+        with self._lock:
+            if self._proc is None:
+                return
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=30)
+            except (BrokenPipeError, subprocess.TimeoutExpired):
+                self._proc.kill()
+            self._proc = None
+
+class WorkerPool:
+    """
+    Up to `size` BlenderWorkers, created on demand, so independent conversions run in
+    separate Blender processes at the same time. A conversion takes whichever worker is
+    idle (the most recently used first, since it is warm) or waits for one to free up.
+    """
+
+    def __init__(self, blender_path: Path, script_path: Path, size: int):
+        self.blender_path = blender_path
+        self.script_path = script_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._workers: List[BlenderWorker] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def worker(self) -> Iterator[BlenderWorker]:
+        """Borrow a worker for one conversion"""
+        worker = self._acquire()
+        try:
+            yield worker
+        finally:
+            self._idle.put(worker)
+
+    def _acquire(self) -> BlenderWorker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._workers) < self.size:
+                worker = BlenderWorker(self.blender_path, self.script_path)
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    def start(self) -> None:
+        """Boot one worker ahead of the first conversion, unless any exist (returns immediately)"""
+        with self._lock:
+            if self._workers:
+                return
+            worker = BlenderWorker(self.blender_path, self.script_path)
+            self._workers.append(worker)
+        worker.start()
+        self._idle.put(worker)
+
+    def close(self) -> None:
+        with self._lock:
+            for worker in self._workers:
+                worker.close()
+
+def run_once(blender_path: Path, script_path: Path, json_path: Path) -> Tuple[int, deque]:
+    """Convert `json_path` in a fresh Blender process, echoing its output live"""
+    cmd = [
+        str(blender_path),
+        "--background",
+        "--python", str(script_path),
+        "--", str(json_path)
+    ]
+    # Keep only the tail for the failure report
+    tail = deque(maxlen=200)
+    with subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+    ) as proc:
+        for line in proc.stdout:
+            sys.stdout.write(line)
+            tail.append(line)
+        returncode = proc.wait()
+    return returncode, tail
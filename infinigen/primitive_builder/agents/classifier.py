@@ -1,13 +1,11 @@
+from typing import Final, List, Tuple, Literal, Optional
+from ._cache import cached, normalize
+from . import _json
 import openai
-from typing import Tuple, Literal
-import json
+from ._client import shared_client
+from . import _rows
 
-class FurnitureClassifier:
-    def __init__(self, api_key: str):
-        self.client = openai.OpenAI(api_key=api_key)
-        
-    def classify(self, prompt: str) -> Tuple[Literal["pass", "does not pass"], str]:
-        system_prompt = """You are an expert at classifying indoor objects and furniture. Your task is to determine if a described object is appropriate for indoor furniture generation.
+SYSTEM_PROMPT: Final[str] = """You are an expert at classifying indoor objects and furniture. Your task is to determine if a described object is appropriate for indoor furniture generation.
 DO NOT use keywords to make your decision. Instead, analyze the object's:
 1. Primary use context (indoor vs outdoor)
 2. Physical characteristics (tangible form, size, stability)
@@ -40,22 +38,51 @@ Output: {
 
 Respond with a JSON object containing 'classification' (either 'pass' or 'does not pass') and 'explanation'."""
 
+class FurnitureClassifier:
+    def __init__(self, api_key: str, client: Optional[openai.OpenAI] = None):
+        self.client = client or shared_client(api_key)
+        self.model = "gpt-4o-2024-08-06"
+        
+    def classify(self, prompt: str) -> Tuple[Literal["pass", "does not pass"], str]:
+        try:
+            return tuple(self._request_classification(prompt))
+            
+        except Exception as e:
+            print(f"Error in classification: {e}")
+            print(f"Error type: {type(e)}")
+            print(f"Full error details: {repr(e)}")
+            return ("does not pass", "Error in classification process")
+
+    def classify_batch(self, prompts: List[str]) -> List[Tuple[Literal["pass", "does not pass"], str]]:
+        """Classify several prompts in one request; falls back to one request per prompt on a bad response"""
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4o-2024-08-06",
+                model=self.model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": SYSTEM_PROMPT + "\n\n" + _rows.ROWS_INSTRUCTIONS},
+                    {"role": "user", "content": _rows.format_rows(prompts)}
                 ],
                 temperature=0.1,
                 response_format={"type": "json_object"}
             )
-            
-            result = json.loads(response.choices[0].message.content)
-            return (result["classification"], result["explanation"])
-            
+            rows = _rows.split_rows(response.choices[0].message.content, len(prompts))
+            return [(row["classification"], row["explanation"]) for row in rows]
+
         except Exception as e:
-            print(f"Error in classification: {e}")
-            print(f"Error type: {type(e)}")
-            print(f"Full error details: {repr(e)}")
-            return ("does not pass", "Error in classification process")
\ No newline at end of file
+            print(f"Batch classification failed ({e}); classifying one prompt at a time")
+            return [self.classify(prompt) for prompt in prompts]
+
+    @cached("classify", key=lambda self, prompt: self.model + SYSTEM_PROMPT + normalize(prompt))
+    def _request_classification(self, prompt: str) -> Tuple[str, str]:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            response_format={"type": "json_object"}
+        )
+        
+        result = _json.loads(response.choices[0].message.content)
+        return (result["classification"], result["explanation"])
\ No newline at end of file
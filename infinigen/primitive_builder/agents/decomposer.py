@@ -1,13 +1,14 @@
-import openai
-from typing import Dict, List
+from typing import Dict, Final, List, Optional
 import json
+from ._cache import cached, normalize
+from . import _json
+import openai
+from ._client import shared_client
+from . import _rows
 
-class SemanticDecomposer:
-    def __init__(self, api_key: str):
-        self.client = openai.OpenAI(api_key=api_key)
-        
-    def decompose(self, prompt: str) -> Dict:
-        system_prompt = """You are a 3D modeling expert specializing in geometric decomposition. Break down objects into their core components, being EXPLICIT about:
+MODEL: Final[str] = "gpt-4o-2024-08-06"
+
+SYSTEM_PROMPT: Final[str] = """You are a 3D modeling expert specializing in geometric decomposition. Break down objects into their core components, being EXPLICIT about:
         1. Quantities of identical components
         2. Their connections
         3. Geometric properties including curvature
@@ -117,47 +118,75 @@ Provide a similar breakdown for the given object, focusing on:
 4. Spatial relationships between components
 5. Nested identical components
 
-Avoid mentioning colors, materials, or textures unless specifically relevant to the shape."""
+Avoid mentioning colors, materials, or textures unless specifically relevant to the shape.
+IMPORTANT: Output ONLY valid JSON with no additional text."""
+
+class SemanticDecomposer:
+    def __init__(self, api_key: str, client: Optional[openai.OpenAI] = None):
+        self.client = client or shared_client(api_key)
+        
+    def decompose(self, prompt: str) -> Dict:
+        try:
+            return self._request_decomposition(prompt)
+                
+        except json.JSONDecodeError as je:
+            print(f"\nJSON parsing error: {str(je)}")
+            print(f"Error occurred at position: {je.pos}")
+            print(f"Line number: {je.lineno}")
+            print(f"Column number: {je.colno}")
+            print("\nProblematic content:")
+            print(je.doc)
+            return None
+                
+        except Exception as e:
+            print(f"\nAPI or other error: {str(e)}")
+            print(f"Full error: {repr(e)}")
+            return None
+
+    @cached("decompose", key=lambda self, prompt: MODEL + SYSTEM_PROMPT + normalize(prompt))
+    def _request_decomposition(self, prompt: str) -> Dict:
+        print("\nSending prompt to GPT-4o...")
+        response = self.client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.2,
+            response_format={"type": "json_object"}  # Force JSON response
+        )
+        
+        print("\nGPT-4o Response received. Attempting to parse JSON...")
+        content = response.choices[0].message.content
+        print(f"\nRaw response:\n{content}")
+        
+        # Find the first '{' and last '}'
+        start_idx = content.find('{')
+        end_idx = content.rfind('}')
+        if start_idx != -1 and end_idx != -1:
+            content = content[start_idx:end_idx + 1]
+            print("\nExtracted JSON content:")
+            print(content)
+        
+        parsed = _json.loads(content)
+        print("\nJSON parsed successfully!")
+        return parsed
 
+    def decompose_batch(self, prompts: List[str]) -> List[Optional[Dict]]:
+        """Decompose several prompts in one request; falls back to one request per prompt on a bad response"""
         try:
-            print("\nSending prompt to GPT-4o...")
+            print(f"\nSending {len(prompts)} prompts to GPT-4o in one request...")
             response = self.client.chat.completions.create(
-                model="gpt-4o-2024-08-06",
+                model=MODEL,
                 messages=[
-                    {"role": "system", "content": system_prompt + "\nIMPORTANT: Output ONLY valid JSON with no additional text."},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": SYSTEM_PROMPT + "\n\n" + _rows.ROWS_INSTRUCTIONS},
+                    {"role": "user", "content": _rows.format_rows(prompts)}
                 ],
                 temperature=0.2,
-                response_format={"type": "json_object"}  # Force JSON response
+                response_format={"type": "json_object"}
             )
-            
-            print("\nGPT-4o Response received. Attempting to parse JSON...")
-            content = response.choices[0].message.content
-            print(f"\nRaw response:\n{content}")
-            
-            try:
-                # Find the first '{' and last '}'
-                start_idx = content.find('{')
-                end_idx = content.rfind('}')
-                if start_idx != -1 and end_idx != -1:
-                    content = content[start_idx:end_idx + 1]
-                    print("\nExtracted JSON content:")
-                    print(content)
-                
-                parsed = json.loads(content)
-                print("\nJSON parsed successfully!")
-                return parsed
-                
-            except json.JSONDecodeError as je:
-                print(f"\nJSON parsing error: {str(je)}")
-                print(f"Error occurred at position: {je.pos}")
-                print(f"Line number: {je.lineno}")
-                print(f"Column number: {je.colno}")
-                print("\nProblematic content:")
-                print(content)
-                return None
-                
+            return _rows.split_rows(response.choices[0].message.content, len(prompts))
+
         except Exception as e:
-            print(f"\nAPI or other error: {str(e)}")
-            print(f"Full error: {repr(e)}")
-            return None
\ No newline at end of file
+            print(f"\nBatch decomposition failed ({e}); decomposing one prompt at a time")
+            return [self.decompose(prompt) for prompt in prompts]
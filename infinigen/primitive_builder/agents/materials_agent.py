@@ -1,16 +1,10 @@
-import openai
-import json
-from typing import Dict, List
+from typing import Dict, Final, List, Optional
 from pathlib import Path
+from . import _json
+import openai
+from ._client import shared_client
 
-class MaterialsAgent:
-    def __init__(self, api_key: str):
-        self.client = openai.OpenAI(api_key=api_key)
-        
-    def assign_materials(self, components: List[Dict]) -> List[Dict]:
-        """Assign appropriate materials to each component"""
-        
-        system_prompt = """You are a materials expert. Analyze the components and output a JSON with appropriate material assignments for each furniture component.
+SYSTEM_PROMPT: Final[str] = """You are a materials expert. Analyze the components and output a JSON with appropriate material assignments for each furniture component.
 
         AVAILABLE MATERIALS:
         1. From infinigen.assets.materials.metal.brushed_metal:
@@ -32,19 +26,25 @@ class MaterialsAgent:
             }
         }"""
 
+class MaterialsAgent:
+    def __init__(self, api_key: str, client: Optional[openai.OpenAI] = None):
+        self.client = client or shared_client(api_key)
+        
+    def assign_materials(self, components: List[Dict]) -> List[Dict]:
+        """Assign appropriate materials to each component"""
         try:
             print("\n=== Assigning Materials to Components ===")
             response = self.client.chat.completions.create(
                 model="gpt-4-0125-preview",
                 messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Please analyze these components and provide a JSON response with material assignments: {json.dumps(components)}"}
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Please analyze these components and provide a JSON response with material assignments: {_json.dumps(components)}"}
                 ],
                 temperature=0.2,
                 response_format={"type": "json_object"}
             )
             
-            material_assignments = json.loads(response.choices[0].message.content)
+            material_assignments = _json.loads(response.choices[0].message.content)
             
             for comp in components:
                 if comp['name'] in material_assignments:
@@ -1,26 +1,17 @@
-import openai
-from typing import Dict, List
+from typing import Dict, Final, List, Optional
 import json
+import logging
 from pathlib import Path
 from .context_provider import ContextProvider
+from . import _json
+import openai
+from ._client import shared_client
+from . import _rows
 
-class PrimitiveGenerator:
-    def __init__(self, api_key: str):
-        self.client = openai.OpenAI(api_key=api_key)
-        self.primitives_dir = Path.home() / "Desktop" / "generated-assets" / "primitives"
-        self.primitives_dir.mkdir(parents=True, exist_ok=True)
-        self.context_provider = ContextProvider()
-        
-    def generate(self, components: Dict) -> List[Dict]:
-        print("\n=== Starting Primitive Generation ===")
-        print("Input components:", json.dumps(components, indent=2))
-        
-        # Get factory context
-        print("\n=== Loading Factory Examples ===")
-        factory_context = self.context_provider.get_factory_context()
-        
-        # Add context to system prompt
-        system_prompt = """You are a 3D modeling expert. Convert each component into optimal operations.
+logger = logging.getLogger(__name__)
+
+# The factory context from ContextProvider goes between these two halves
+_SYSTEM_PROMPT_HEAD: Final[str] = """You are a 3D modeling expert. Convert each component into optimal operations.
 
 CRITICAL ORDERING RULES:
 1. Always start with ground-touching components (legs, base supports)
@@ -48,7 +39,9 @@ Example Order for Cabinet:
 10. Top panel
 
 FACTORY EXAMPLES FOR REFERENCE:
-""" + factory_context + """
+"""
+
+_SYSTEM_PROMPT_TAIL: Final[str] = """
 
 AVAILABLE FUNCTIONS (Choose the best for each component):
 CRITICAL RULES:
@@ -371,13 +364,34 @@ Before outputting, verify that EVERY SINGLE component from the decomposer has co
 
 Output ONLY valid JSON with no additional text."""
 
+class PrimitiveGenerator:
+    def __init__(self, api_key: str, client: Optional[openai.OpenAI] = None):
+        self.client = client or shared_client(api_key)
+        self.primitives_dir = Path.home() / "Desktop" / "generated-assets" / "primitives"
+        self.primitives_dir.mkdir(parents=True, exist_ok=True)
+        self.context_provider = ContextProvider()
+        self._system_prompt = None
+        
+    def _load_system_prompt(self) -> None:
+        """Factory context is scanned from disk once per generator, not once per call"""
+        if self._system_prompt is None:
+            print("\n=== Loading Factory Examples ===")
+            factory_context = self.context_provider.get_factory_context()
+            self._system_prompt = _SYSTEM_PROMPT_HEAD + factory_context + _SYSTEM_PROMPT_TAIL
+
+    def generate(self, components: Dict) -> List[Dict]:
+        print("\n=== Starting Primitive Generation ===")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Input components: %s", _json.dumps(components, indent=True))
+        
+        self._load_system_prompt()
         try:
             print("\nCalling GPT-4o...")
             response = self.client.chat.completions.create(
                 model="gpt-4o-2024-08-06",
                 messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": json.dumps(components)}
+                    {"role": "system", "content": self._system_prompt},
+                    {"role": "user", "content": _json.dumps(components)}
                 ],
                 temperature=0.2,
                 response_format={"type": "json_object"}
@@ -387,7 +401,7 @@ Output ONLY valid JSON with no additional text."""
             print("\nInitial GPT Response:", content)  # Debug print
             
             try:
-                parsed = json.loads(content)
+                parsed = _json.loads(content)
                 if "components" not in parsed:
                     print("Error: Response missing 'components' list")
                     return []
@@ -404,3 +418,24 @@ Output ONLY valid JSON with no additional text."""
         except Exception as e:
             print(f"\nError in primitive generation: {e}")
             return []
+
+    def generate_batch(self, components_list: List[Dict]) -> List[List[Dict]]:
+        """Generate operations for several decompositions in one request; falls back to one request each on a bad response"""
+        print(f"\n=== Starting Batched Primitive Generation ({len(components_list)} objects) ===")
+        self._load_system_prompt()
+        try:
+            response = self.client.chat.completions.create(
+                model="gpt-4o-2024-08-06",
+                messages=[
+                    {"role": "system", "content": self._system_prompt + "\n\n" + _rows.ROWS_INSTRUCTIONS},
+                    {"role": "user", "content": _rows.format_rows([_json.dumps(c) for c in components_list])}
+                ],
+                temperature=0.2,
+                response_format={"type": "json_object"}
+            )
+            rows = _rows.split_rows(response.choices[0].message.content, len(components_list))
+            return [row.get("components", []) if isinstance(row, dict) else [] for row in rows]
+
+        except Exception as e:
+            print(f"\nBatch primitive generation failed ({e}); generating one object at a time")
+            return [self.generate(components) for components in components_list]
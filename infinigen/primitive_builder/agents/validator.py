@@ -1,12 +1,31 @@
-from typing import Dict, List, Tuple
+from typing import Dict, Final, List, Tuple, Optional
+import logging
 import numpy as np
-import openai
 from pathlib import Path
-import json
+import openai
+from ._client import shared_client
+from . import _json
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_MAP_PROMPT: Final[str] = """Given these components, output ONLY a connection map showing which components should connect.
+        
+        Example Input: Table with 4 legs and a top
+        Example Output:
+        {
+            "Table_Top": ["Table_Leg_1", "Table_Leg_2", "Table_Leg_3", "Table_Leg_4"],
+            "Table_Leg_1": ["Table_Top"],
+            "Table_Leg_2": ["Table_Top"],
+            "Table_Leg_3": ["Table_Top"],
+            "Table_Leg_4": ["Table_Top"]
+        }
+        
+        DO NOT output component definitions. ONLY output the connection map.
+        Respond with a JSON object mapping each component name to the list of names it connects to."""
 
 class ComponentValidator:
-    def __init__(self, api_key: str):
-        self.client = openai.OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, client: Optional[openai.OpenAI] = None):
+        self.client = client or shared_client(api_key)
 
     def validate_and_fix(self, components: List[Dict]) -> List[Dict]:
         """Main validation pipeline"""
@@ -15,8 +34,8 @@ class ComponentValidator:
         
         # 1. Get connection map from LLM
         connection_map = self._get_connection_map(components)
-        print("\nConnection Map:")
-        print(json.dumps(connection_map, indent=2))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("\nConnection Map:\n%s", _json.dumps(connection_map, indent=True))
         
         # 2. FIRST ensure ground contact for legs/base
         components = self._ensure_ground_contact(components)
@@ -32,35 +51,23 @@ class ComponentValidator:
         print("\n=== Getting Connection Map ===")
         
         # First try LLM
-        system_prompt = """Given these components, output ONLY a connection map showing which components should connect.
-        
-        Example Input: Table with 4 legs and a top
-        Example Output:
-        {
-            "Table_Top": ["Table_Leg_1", "Table_Leg_2", "Table_Leg_3", "Table_Leg_4"],
-            "Table_Leg_1": ["Table_Top"],
-            "Table_Leg_2": ["Table_Top"],
-            "Table_Leg_3": ["Table_Top"],
-            "Table_Leg_4": ["Table_Top"]
-        }
-        
-        DO NOT output component definitions. ONLY output the connection map."""
-
         try:
             response = self.client.chat.completions.create(
                 model="gpt-4o-2024-08-06",
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": CONNECTION_MAP_PROMPT},
                     {"role": "user", "content": str([c["name"] for c in components])}  # Only send names
                 ],
-                temperature=0.2
+                temperature=0.2,
+                response_format={"type": "json_object"}
             )
             
             try:
-                result = eval(response.choices[0].message.content)
-                print("LLM Connection Map:", json.dumps(result, indent=2))
+                result = _json.loads(response.choices[0].message.content)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("LLM Connection Map: %s", _json.dumps(result, indent=True))
                 return result
-            except:
+            except _json.JSONDecodeError:
                 print("Failed to parse LLM response, using default connections")
                 return self._get_default_connections(components)
             
@@ -88,7 +95,8 @@ class ComponentValidator:
             for leg in leg_names:
                 connection_map[leg] = [top_name]
         
-        print("Default Connection Map:", json.dumps(connection_map, indent=2))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Default Connection Map: %s", _json.dumps(connection_map, indent=True))
         return connection_map
 
     def _validate_connections(self, components: List[Dict], connection_map: Dict[str, List[str]]) -> List[Dict]:
@@ -97,43 +105,45 @@ class ComponentValidator:
         
         # Make a copy of components to modify
         updated_components = components.copy()
+        # Name -> index of its first occurrence, built once instead of rescanning the list for every lookup
+        index_by_name = {}
+        for i, c in enumerate(updated_components):
+            index_by_name.setdefault(c["name"], i)
         
         # FIRST: Check if legs need horizontal adjustment (ONLY FOR CHAIRS, NOT TABLES)
         seat = next((c for c in updated_components if "Seat" in c["name"]), None)
         table_top = next((c for c in updated_components if "Table_Top" in c["name"]), None)
         legs = [c for c in updated_components if "Leg" in c["name"]]
         
+        # Leg top points as one (n_legs, 3) array, so the distance and height checks below
+        # run as single NumPy operations instead of once per leg
+        leg_tops = np.array([self._get_connection_point(leg)["top"]["point"] for leg in legs]).reshape(-1, 3)
+        
         if seat and legs:  # Only adjust leg positions for chairs
             target_points = self._get_connection_point(seat)
             target_bottom = target_points["bottom"]["point"]
             
-            for leg in legs:
-                leg_idx = next(i for i, c in enumerate(updated_components) if c["name"] == leg["name"])
-                leg_points = self._get_connection_point(leg)
-                leg_top = leg_points["top"]["point"]
-                
-                # Check horizontal distance (x,y only)
-                horizontal_dist = np.sqrt((leg_top[0] - target_bottom[0])**2 + (leg_top[1] - target_bottom[1])**2)
-                if horizontal_dist > 0.1:  # If leg is not under seat
-                    print(f"\nLeg {leg['name']} not under seat, horizontal distance: {horizontal_dist}")
-                    # Move leg horizontally to seat (chairs only)
-                    leg["operations"][0]["transform"]["location"][0] = target_bottom[0]
-                    leg["operations"][0]["transform"]["location"][1] = target_bottom[1]
-                    updated_components[leg_idx] = leg
-                    print(f"Moved leg to seat position: ({target_bottom[0]}, {target_bottom[1]})")
+            # Check horizontal distance (x,y only)
+            horizontal_dists = np.hypot(leg_tops[:, 0] - target_bottom[0], leg_tops[:, 1] - target_bottom[1])
+            for i in np.flatnonzero(horizontal_dists > 0.1):  # Legs not under the seat
+                leg = legs[i]
+                leg_idx = index_by_name[leg["name"]]
+                print(f"\nLeg {leg['name']} not under seat, horizontal distance: {horizontal_dists[i]}")
+                # Move leg horizontally to seat (chairs only)
+                leg["operations"][0]["transform"]["location"][0] = target_bottom[0]
+                leg["operations"][0]["transform"]["location"][1] = target_bottom[1]
+                updated_components[leg_idx] = leg
+                print(f"Moved leg to seat position: ({target_bottom[0]}, {target_bottom[1]})")
         
         # SECOND: Find highest leg point to snap seat/table to
-        highest_leg_z = float('-inf')
-        for leg in legs:
-            leg_points = self._get_connection_point(leg)
-            leg_top = leg_points["top"]["point"]
-            highest_leg_z = max(highest_leg_z, leg_top[2])
+        # (moving legs horizontally above leaves their heights unchanged)
+        highest_leg_z = float(leg_tops[:, 2].max()) if len(legs) else float('-inf')
         
         print(f"\nHighest leg point found: {highest_leg_z}")
         
         # THIRD: Snap seat/table to legs - MOVE DOWN TO LEGS, NOT LEGS UP!
         if seat:
-            seat_idx = next(i for i, c in enumerate(updated_components) if c["name"] == seat["name"])
+            seat_idx = index_by_name[seat["name"]]
             seat_points = self._get_connection_point(seat)
             seat_bottom = seat_points["bottom"]["point"]
             
@@ -146,7 +156,7 @@ class ComponentValidator:
             updated_components[seat_idx] = seat
             print(f"Snapped seat to legs at height {highest_leg_z}")
         elif table_top:  # Handle table top ONCE, only Z-axis
-            table_idx = next(i for i, c in enumerate(updated_components) if c["name"] == table_top["name"])
+            table_idx = index_by_name[table_top["name"]]
             table_points = self._get_connection_point(table_top)
             table_bottom = table_points["bottom"]["point"]
             
@@ -162,7 +172,7 @@ class ComponentValidator:
         # FOURTH: Handle any remaining connections (like backrest)
         for comp_name, should_connect_to in connection_map.items():
             if "Leg" not in comp_name and "Seat" not in comp_name and "Table_Top" not in comp_name:  # Skip legs and seat/table as we handled them
-                comp_idx = next((i for i, c in enumerate(updated_components) if c["name"] == comp_name), None)
+                comp_idx = index_by_name.get(comp_name)
                 if comp_idx is None:
                     continue
                     
@@ -171,9 +181,10 @@ class ComponentValidator:
                 comp_points = self._get_connection_point(comp)
                 
                 for target_name in should_connect_to:
-                    target = next((c for c in updated_components if c["name"] == target_name), None)
-                    if not target:
+                    target_idx = index_by_name.get(target_name)
+                    if target_idx is None:
                         continue
+                    target = updated_components[target_idx]
                         
                     target_points = self._get_connection_point(target)
                     
@@ -208,6 +219,9 @@ class ComponentValidator:
             print(f"Base component lowest points: {base_lowest_points}")
             ground_adjustment = min(base_lowest_points) - ground_level
             print(f"Ground adjustment needed: {ground_adjustment}")
+            if ground_adjustment == 0:
+                # Already on the ground: every adjustment below would be a no-op
+                return components
             
             # First adjust base components to ground
             for comp in base_components:
@@ -225,8 +239,10 @@ class ComponentValidator:
                     print(f"Warning: Could not adjust {comp['name']}: {e}")
             
             # Then adjust all other components to maintain relative positions
+            # (by identity: `in` on the list would deep-compare every pair of dicts)
+            base_ids = {id(c) for c in base_components}
             for comp in components:
-                if comp not in base_components:
+                if id(comp) not in base_ids:
                     try:
                         comp["operations"][0]["transform"]["location"][2] -= ground_adjustment
                         print(f"Adjusted {comp['name']} by same amount to maintain relative position")
@@ -247,10 +263,7 @@ class ComponentValidator:
                 anchors = np.array(operation["params"]["anchors"])
                 
                 # Need to transpose to get individual points
-                points = np.array([
-                    [anchors[0][i], anchors[1][i], anchors[2][i]] 
-                    for i in range(len(anchors[0]))
-                ])
+                points = anchors[:3].T
                 
                 # Add location transform to each point
                 points = points + location
@@ -393,7 +406,7 @@ class ComponentValidator:
             
         except Exception as e:
             print(f"Error in snap_to_point for {component['name']}: {e}")
-            print(f"Component structure: {json.dumps(component, indent=2)}")
+            print(f"Component structure: {_json.dumps(component, indent=True)}")
             return component
 
     def _get_lowest_point(self, component: Dict) -> float:
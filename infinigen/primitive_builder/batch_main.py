@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Fan a file of prompts out to a pool of DirectPrimitiveGenerator processes.
+
+Each process builds its own generator (and so its own OpenAI client and Blender
+worker), is pinned to one CPU core where the platform allows it, and writes its
+outputs under `<output_dir>/<worker_index>/` so processes never share files.
+"""
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+project_root = Path(__file__).parent.parent
+# primitive_builder.pth (see install_pth.py) normally puts the repo root on sys.path already
+if importlib.util.find_spec("primitive_builder") is None:
+    sys.path.insert(0, str(project_root))
+
+from primitive_builder.direct_primitive_agent import DirectPrimitiveGenerator
+
+# Per-process state, set up once by _init_worker
+_generator: Optional[DirectPrimitiveGenerator] = None
+_worker_dir: Optional[Path] = None
+
+def _init_worker(api_key: str, output_dir: str, counter) -> None:
+    global _generator, _worker_dir
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {index % os.cpu_count()})
+
+    _worker_dir = Path(output_dir) / str(index)
+    _worker_dir.mkdir(parents=True, exist_ok=True)
+    # Built after the fork so no HTTP/TLS state is shared between processes.
+    # One Blender per process: the pool itself already spreads work over the cores
+    _generator = DirectPrimitiveGenerator(api_key, blender_workers=1)
+
+def _run_prompt(job: Tuple[int, str]) -> Tuple[int, str, Optional[str], Optional[str]]:
+    i, prompt = job
+    try:
+        json_path, blend_path = _generator.generate(prompt, str(_worker_dir / f"prompt_{i}.json"))
+    except Exception as e:
+        print(f"✗ Error processing prompt {i}: {e}")
+        json_path, blend_path = None, None
+    return i, prompt, json_path, blend_path
+
+def read_prompts(path: Path) -> List[str]:
+    """One prompt per line; blank lines and lines starting with '#' are skipped"""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate furniture for many prompts in parallel processes")
+    parser.add_argument("prompts_file", type=str, help="Text file with one prompt per line")
+    parser.add_argument("--output-dir", type=str, default=str(Path.home() / "Desktop" / "generated-assets" / "batch"),
+                        help="Directory for outputs; each process writes to its own subdirectory")
+    parser.add_argument("--num-processes", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--num-calls-per-process", type=int, default=None,
+                        help="Restart each worker process after this many prompts (default: never)")
+    args = parser.parse_args()
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        print("ERROR: OPENAI_API_KEY not set in environment")
+        sys.exit(1)
+
+    prompts = read_prompts(Path(args.prompts_file))
+    print(f"Processing {len(prompts)} prompts with {args.num_processes} processes")
+
+    counter = multiprocessing.Value("i", 0)
+    with multiprocessing.Pool(
+        args.num_processes,
+        initializer=_init_worker,
+        initargs=(api_key, str(Path(args.output_dir).expanduser()), counter),
+        maxtasksperchild=args.num_calls_per_process,
+    ) as pool:
+        succeeded = 0
+        for i, prompt, json_path, blend_path in pool.imap_unordered(_run_prompt, enumerate(prompts)):
+            if blend_path:
+                succeeded += 1
+                print(f"✓ [{i}] '{prompt}' → {blend_path}")
+            else:
+                print(f"✗ [{i}] '{prompt}' failed (JSON: {json_path})")
+
+    print(f"\nDone: {succeeded}/{len(prompts)} prompts produced a .blend file")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Long-lived Blender process that converts JSON specs into .blend files.
+
+Run as:
+    blender --background --python blender_worker.py -- <conversion_script.py>
+
+Reads one JSON spec path per line on stdin, runs the conversion script on it
+inside this Blender process (as if launched with `-- <json_path>`), and reports
+each result on stdout as `BLENDER_WORKER_DONE <returncode> <json_path>`.
+This pays Blender's startup and bpy import once instead of once per spec.
+"""
+import runpy
+import sys
+import traceback
+
+import bpy
+
+DONE_MARKER = "BLENDER_WORKER_DONE"
+
+def run_job(script_path: str, json_path: str) -> int:
+    """Run the conversion script on one JSON spec in a fresh, empty scene"""
+    bpy.ops.wm.read_homefile(use_empty=True)
+    sys.argv = [sys.argv[0], "--", json_path]
+    try:
+        runpy.run_path(script_path, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+def main():
+    # Nothing here is ever undone, so skip the undo step every operator would push
+    bpy.context.preferences.edit.use_global_undo = False
+    argv = sys.argv[sys.argv.index("--") + 1:]
+    script_path = argv[0]
+
+    for line in sys.stdin:
+        json_path = line.strip()
+        if not json_path:
+            continue
+        returncode = run_job(script_path, json_path)
+        print(f"{DONE_MARKER} {returncode} {json_path}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -2,93 +2,59 @@ import sys
 from pathlib import Path
 from typing import Optional
 
-# Add project root to Python path
-project_root = Path(__file__).parent.parent.parent
-sys.path.append(str(project_root))
-
-import openai
-from typing import Dict, List, Any, Tuple
+from typing import Dict, Final, List, Any, Tuple
 import json
-import subprocess
+import logging
 import os
+import uuid
 import argparse
 from agents.classifier import FurnitureClassifier
 from agents.materials_agent import MaterialsAgent
+from agents import _cache, _json, blend_cache, blender_process
+from agents._client import shared_client
+from agents.blender_process import find_blender
 
-def find_blender() -> Path:
-    """Find Blender executable on the system"""
-    # Common Blender installation paths
-    possible_paths = [
-        # macOS
-        Path("/Applications/Blender.app/Contents/MacOS/Blender"),
-        # Linux
-        Path("/usr/bin/blender"),
-        Path("/usr/local/bin/blender"),
-        # Windows
-        Path("C:/Program Files/Blender Foundation/Blender 3.x/blender.exe"),
-        Path("C:/Program Files/Blender Foundation/Blender 4.x/blender.exe"),
-    ]
-
-    # Check if blender is in PATH
-    try:
-        blender_path = subprocess.check_output(["which", "blender"], text=True).strip()
-        if blender_path:
-            return Path(blender_path)
-    except subprocess.CalledProcessError:
-        pass
-
-    # Check common installation paths
-    for path in possible_paths:
-        if path.exists():
-            return path
+logger = logging.getLogger(__name__)
 
-    return None
+# Checkout root, used to locate the conversion script. Nothing is imported from it:
+# `agents` resolves from this script's own directory
+project_root = Path(__file__).parent.parent.parent
+# JSON → .blend conversion script run inside Blender
+_SCRIPT_PATH = (project_root / "infinigen" / "primitive_builder" / "generate_blend_from_json.py").resolve()
 
-def generate_blend_file(json_path: Path) -> Optional[Path]:
-    """Generate Blender file from JSON specifications"""
+def generate_blend_file(json_path: Path, worker: Optional[blender_process.BlenderWorker] = None) -> Optional[Path]:
+    """
+    Generate Blender file from JSON specifications, in `worker` when one is given
+    (falling back to a one-off Blender process if it has died).
+    """
     try:
-        
         # Find Blender executable
         blender_path = find_blender()
-        print(f"4. Blender path: {blender_path}")
+        logger.debug("Blender path: %s", blender_path)
         if not blender_path:
             print("Error: Could not find Blender executable")
             return None
 
-        # Construct the command
-        script_path = project_root / "infinigen" / "primitive_builder" / "generate_blend_from_json.py"
-        print(f"5. Script path exists: {script_path.exists()}")
-        print(f"6. Script path absolute: {script_path.absolute()}")
-        
-        cmd = [
-            str(blender_path),
-            "--background",
-            "--python",
-            str(script_path),
-            "--",
-            str(json_path)
-        ]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Script path: %s (exists: %s)", _SCRIPT_PATH, _SCRIPT_PATH.exists())
 
-        # Run the command
-        print(f"\n7. Running command: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        returncode = None
+        if worker:
+            returncode, tail = worker.run(json_path)
+        if returncode is None:
+            returncode, tail = blender_process.run_once(blender_path, _SCRIPT_PATH, json_path)
         
-        print(f"8. Command return code: {result.returncode}")
-        if result.stderr:
-            print(f"9. Command stderr:\n{result.stderr}")
-        if result.stdout:
-            print(f"10. Command stdout:\n{result.stdout}")
+        logger.debug("Command return code: %s", returncode)
         
-        if result.returncode == 0:
+        if returncode == 0:
             # The blend file will be in the same directory as the JSON file
             blend_path = json_path.with_suffix('.blend')
-            print(f"11. Expected blend path: {blend_path}")
-            print(f"12. Blend file exists: {blend_path.exists()}")
+            logger.debug("Expected blend path: %s", blend_path)
             if blend_path.exists():
                 return blend_path
         else:
-            print(f"Error running Blender: {result.stderr}")
-            print(f"Command output: {result.stdout}")
+            print("Error running Blender. Last lines of output:")
+            print("".join(tail))
         
         return None
 
@@ -99,21 +65,34 @@ def generate_blend_file(json_path: Path) -> Optional[Path]:
         print(traceback.format_exc())
         return None
 
-class DecomposedPrimitiveGenerator:
-    """An agent that generates primitive operations through semantic decomposition."""
-    
-    def __init__(self, api_key: str):
-        self.client = openai.OpenAI(api_key=api_key)
-        self.classifier = FurnitureClassifier(api_key)
-        self.materials_agent = MaterialsAgent(api_key)
-        
-    def classify(self, prompt: str) -> Tuple[str, str]:
-        """First step: Classify if the prompt is valid furniture"""
-        return self.classifier.classify(prompt)
+def _expand(specs: List[Any]) -> List[Dict[str, Any]]:
+    """Expand the compact positional components returned by the LLM into full component specs"""
+    components = []
+    for spec in specs:
+        # Already in the full form (older prompt or model ignored the compact format)
+        if isinstance(spec, dict):
+            components.append(spec)
+            continue
 
-    def generate_primitives(self, prompt: str) -> List[Dict[str, Any]]:
-        """Generate primitive operations directly from text description"""
-        system_prompt = """You are a 3D modeling expert. Convert the following furniture description into a series of primitive operations.
+        name, operations = spec
+        components.append({
+            "name": name,
+            "operations": [
+                {
+                    "operation": operation,
+                    "params": params,
+                    "transform": {
+                        "location": location,
+                        "rotation": rotation,
+                        "scale": scale
+                    }
+                }
+                for operation, params, location, rotation, scale in operations
+            ]
+        })
+    return components
+
+_SYSTEM_PROMPT_PRIMITIVES: Final[str] = """You are a 3D modeling expert. Convert the following furniture description into a series of primitive operations.
         
         Available primitive operations:
         - build_prism_mesh: n (sides), r_min, r_max, height, tilt
@@ -138,62 +117,80 @@ class DecomposedPrimitiveGenerator:
         3. The exact parameters for that operation
         4. The transform (location, rotation, scale) to position it correctly
         
-        Respond with a JSON array of components, each containing:
-        {
-            "name": "component_name",
-            "operations": [
-                {
-                    "operation": "operation_name",
-                    "params": {param_name: value},
-                    "transform": {
-                        "location": [x, y, z],
-                        "rotation": [x, y, z],
-                        "scale": [x, y, z]
-                    }
-                }
-            ]
-        }
+        Respond with a JSON object of the form {"components": [...]}, holding a compact array of components. Each component is a two-element array
+        [name, operations], and each operation is a five-element array
+        [operation, params, location, rotation, scale]:
+        ["component_name", [["operation_name", {param_name: value}, [x, y, z], [rx, ry, rz], [sx, sy, sz]]]]
+        
+        Do not emit "name", "operations", "operation", "params" or "transform" keys; use the positional form only.
         
         Example for a chair leg:
-        {
-            "name": "Leg_1",
-            "operations": [
-                {
-                    "operation": "build_cylinder_mesh",
-                    "params": {
-                        "radius": 0.02,
-                        "height": 0.4,
-                        "segments": 16
-                    },
-                    "transform": {
-                        "location": [-0.2, 0.2, 0.2],
-                        "rotation": [0, 0, 0],
-                        "scale": [1, 1, 1]
-                    }
-                }
-            ]
-        }"""
+        {"components": [["Leg_1", [["build_cylinder_mesh", {"radius": 0.02, "height": 0.4, "segments": 16}, [-0.2, 0.2, 0.2], [0, 0, 0], [1, 1, 1]]]]]}"""
+
+class DecomposedPrimitiveGenerator:
+    """An agent that generates primitive operations through semantic decomposition."""
+    
+    def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
+        self.client = shared_client(api_key)
+        self.model = model
+        self.classifier = FurnitureClassifier(api_key)
+        self.materials_agent = MaterialsAgent(api_key)
+        # Long-lived Blender process, created on the first conversion (see agents/blender_process.py)
+        self._worker: Optional[blender_process.BlenderWorker] = None
+
+    def _get_worker(self) -> Optional[blender_process.BlenderWorker]:
+        """Return the shared Blender worker, or None if Blender is not installed"""
+        if self._worker is None:
+            blender_path = find_blender()
+            if blender_path:
+                self._worker = blender_process.BlenderWorker(blender_path, _SCRIPT_PATH)
+        return self._worker
 
+    def close(self) -> None:
+        """Shut down the persistent Blender worker, if one was started"""
+        if self._worker:
+            self._worker.close()
+        
+    def classify(self, prompt: str) -> Tuple[str, str]:
+        """First step: Classify if the prompt is valid furniture"""
+        return self.classifier.classify(prompt)
+
+    def generate_primitives(self, prompt: str) -> List[Dict[str, Any]]:
+        """Generate primitive operations directly from text description"""
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
+            stream = self.client.chat.completions.create(
+                model=self.model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": _SYSTEM_PROMPT_PRIMITIVES},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.1
+                temperature=0.1,
+                response_format={"type": "json_object"},
+                stream=True
             )
             
-            content = response.choices[0].message.content
-            print(f"Debug - Raw response content: {content}")
+            # Echo tokens to stderr as they arrive so long responses show progress
+            chunks = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    sys.stderr.write(delta)
+                    sys.stderr.flush()
+            sys.stderr.write("\n")
+            content = "".join(chunks)
             
             # Parse the response as JSON
             try:
-                operations = json.loads(content)
+                operations = _json.loads(content)
                 if isinstance(operations, list):
-                    return operations
+                    return _expand(operations)
+                elif isinstance(operations, dict) and "components" in operations:
+                    return _expand(operations["components"])
                 elif isinstance(operations, dict) and "operations" in operations:
-                    return operations["operations"]
+                    return _expand(operations["operations"])
                 else:
                     print(f"Error: Unexpected response format: {type(operations)}")
                     return []
@@ -211,6 +208,20 @@ class DecomposedPrimitiveGenerator:
         print("\n=== Starting Generation Pipeline ===")
         print(f"Input Prompt: '{prompt}'")
         
+        if output_path:
+            # If output path ends with .blend, replace it with .json
+            json_path = Path(output_path).with_suffix('.json').expanduser()
+        else:
+            # Unique per call so concurrent runs never overwrite each other's files
+            json_path = Path.home() / "Desktop" / "generated-assets" / f"primitives_{uuid.uuid4().hex[:8]}.json"
+        
+        # Reuse a recent identical run if one is cached (not with --no-cache)
+        key = blend_cache.cache_key("decomposed", prompt, output_path, self.model)
+        cached = blend_cache.lookup(json_path, key) if _cache.is_enabled() else None
+        if cached:
+            print(f"✓ Cache hit, reusing: {cached[1]}")
+            return str(cached[0]), str(cached[1])
+        
         # Step 1: Classification
         print("\n1. Running Classifier...")
         classification, explanation = self.classify(prompt)
@@ -228,8 +239,8 @@ class DecomposedPrimitiveGenerator:
             print("Error: No primitive specifications generated")
             return None, None
             
-        print("Generated Specifications:")
-        print(json.dumps(primitive_specs, indent=2))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generated Specifications:\n%s", _json.dumps(primitive_specs, indent=True))
         
         # Step 3: Assign Materials
         print("\n3. Assigning Materials...")
@@ -241,18 +252,10 @@ class DecomposedPrimitiveGenerator:
 
         # Step 4: Save JSON file
         print("\n4. Saving JSON file...")
-        if output_path:
-            # If output path ends with .blend, replace it with .json
-            output_path = str(Path(output_path).with_suffix('.json'))
-            json_path = Path(output_path).expanduser()
-        else:
-            json_path = Path.home() / "Desktop" / "generated-assets" / "primitives.json"
-        
         json_path.parent.mkdir(parents=True, exist_ok=True)
         
         try:
-            with open(json_path, 'w') as f:
-                json.dump(components_with_materials, f, indent=2)
+            _json.dump_iter(components_with_materials, json_path)
             print(f"JSON file saved at: {json_path}")
         except Exception as e:
             print(f"Error saving JSON file: {e}")
@@ -260,9 +263,11 @@ class DecomposedPrimitiveGenerator:
 
         # Step 5: Generate Blender file
         print("\n5. Generating Blender file...")
-        blend_path = generate_blend_file(json_path)
+        blend_path = generate_blend_file(json_path, self._get_worker())
         if blend_path:
             print(f"✓ Blender file generated at: {blend_path}")
+            if _cache.is_enabled():
+                blend_cache.store(json_path, blend_path, key)
             return str(json_path), str(blend_path)
         else:
             print("Failed to generate Blender file")
@@ -273,7 +278,12 @@ def main():
     parser.add_argument('prompt', type=str, help='Description of the furniture to generate')
     parser.add_argument('--output', type=str, help='Output path for the files', default=None)
     parser.add_argument('--json-only', action='store_true', help='Only generate JSON file, skip Blender file generation')
+    parser.add_argument('--no-cache', action='store_true', help='Always call OpenAI instead of reusing cached classifier results')
+    parser.add_argument('--verbose', action='store_true', help='Print debug output')
+    parser.add_argument('--model', type=str, default='gpt-4o-mini', help='OpenAI model used for primitive generation (e.g. gpt-4 for higher accuracy)')
     args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    _cache.set_enabled(not args.no_cache)
 
     # Get API key from environment variable
     api_key = os.getenv('OPENAI_API_KEY')
@@ -282,8 +292,11 @@ def main():
         print("Please set it using: export OPENAI_API_KEY='your-api-key'")
         sys.exit(1)
 
-    generator = DecomposedPrimitiveGenerator(api_key)
-    json_path, blend_path = generator.generate(args.prompt, args.output)
+    generator = DecomposedPrimitiveGenerator(api_key, model=args.model)
+    try:
+        json_path, blend_path = generator.generate(args.prompt, args.output)
+    finally:
+        generator.close()
     
     if json_path:
         if not args.json_only and blend_path:
@@ -1,80 +1,73 @@
 #!/usr/bin/env python3
 import os
+import re
 import sys
 import time
+import uuid
 import json
-import subprocess
+import importlib.util
+import logging
+import threading
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Final, Iterable, Iterator, List, Tuple, Optional
 
 # (1) Make sure our repo root is on sys.path so that `infinigen` and others can be imported.
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+# primitive_builder.pth (see install_pth.py) normally puts the repo root on sys.path already
+if importlib.util.find_spec("primitive_builder") is None:
+    sys.path.insert(0, str(project_root))
 
 # Attempt to import FurnitureClassifier—fail loudly if it's not present.
 try:
     from primitive_builder.agents.classifier import FurnitureClassifier
+    from primitive_builder.agents import _cache, _json, batch_api, blend_cache, blender_process
+    from primitive_builder.agents._client import shared_client
+    from primitive_builder.agents.blender_process import find_blender
 except Exception as e:
     print("ERROR: Could not import FurnitureClassifier from primitive_builder.agents.classifier")
     print("Make sure `primitive_builder/agents/classifier.py` is on sys.path and has no errors.")
     raise
 
-def find_blender() -> Optional[Path]:
+logger = logging.getLogger(__name__)
+
+# JSON → .blend conversion script run inside Blender
+_SCRIPT_PATH = (project_root / "primitive_builder" / "new_blendrtojson.py").resolve()
+
+# Cheap first-stage gate: prompts that name an obvious furniture item (or an obvious
+# non-furniture subject) are classified locally; only ambiguous ones reach the LLM
+_FURNITURE_KW = re.compile(
+    r"\b(chairs?|tables?|desks?|sofas?|couch(es)?|beds?|shel(f|ves)|cabinets?|stools?|lamps?|"
+    r"benches|bench|drawers?|wardrobes?|dressers?|nightstands?|bookcases?|ottomans?)\b",
+    re.IGNORECASE,
+)
+_NON_FURNITURE_KW = re.compile(
+    r"\b(cars?|trucks?|bicycles?|person|people|animals?|dogs?|cats?|birds?|trees?|flowers?|"
+    r"gardens?|mountains?|oceans?|buildings?|concept|idea|feeling)\b",
+    re.IGNORECASE,
+)
+
+def quick_classify(prompt: str) -> Optional[Tuple[str, str]]:
     """
-    Find a Blender executable on the system. Check `which blender` first, then common install paths.
-    Return None if not found.
+    Keyword pre-classifier. Return ("pass" | "does not pass", explanation) when exactly
+    one of the keyword patterns matches, or None when the LLM classifier should decide.
     """
-    # Check if `blender` is on PATH
-    try:
-        blender_path = subprocess.check_output(["which", "blender"], text=True).strip()
-        if blender_path:
-            return Path(blender_path)
-    except subprocess.CalledProcessError:
-        pass
-
-    # Common installation locations
-    candidates = [
-        # macOS
-        Path("/Applications/Blender.app/Contents/MacOS/Blender"),
-        # Linux
-        Path("/usr/bin/blender"),
-        Path("/usr/local/bin/blender"),
-        # Windows (if ever on Windows)
-        Path("C:/Program Files/Blender Foundation/Blender 3.x/blender.exe"),
-        Path("C:/Program Files/Blender Foundation/Blender 4.x/blender.exe"),
-    ]
-    for p in candidates:
-        if p.exists():
-            return p
-
+    is_furniture = _FURNITURE_KW.search(prompt)
+    is_other = _NON_FURNITURE_KW.search(prompt)
+    if is_furniture and not is_other:
+        return "pass", f"Names a furniture item ('{is_furniture.group(0)}')"
+    if is_other and not is_furniture:
+        return "does not pass", f"Names a non-furniture subject ('{is_other.group(0)}')"
     return None
 
-class DirectPrimitiveGenerator:
-    """
-    -------------
-    DRIVER SCRIPT
-    -------------
-    1) Classify the prompt via FurnitureClassifier.
-    2) Call OpenAI to get a JSON spec for primitives.
-    3) Write that JSON to disk.
-    4) Launch Blender in background, running `new_blendrtojson.py -- <json_path>`.
-    """
-
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.classifier = FurnitureClassifier(api_key)
+def _log_metrics(metrics: Dict[str, Any], start_ns: int, status: str) -> None:
+    """Log a call's stage timings as a single greppable `METRICS {...}` JSON line"""
+    metrics["total_ns"] = time.perf_counter_ns() - start_ns
+    metrics["status"] = status
+    logger.info("METRICS %s", _json.dumps(metrics))
 
-    def generate_primitives(self, prompt: str) -> list:
-        """
-        Call OpenAI to get a JSON array of component specs.
-        Each component must be a dict with at least:
-          - "name": str
-          - "operations": list of { "operation": str, "params": {...}, "transform": {...} }
-        """
-        import openai
-
-        system_prompt = """
+_SYSTEM_PROMPT_PRIMITIVES: Final[str] = """
 You are a 3D modeling expert. Convert the following furniture description into a JSON array of primitive operations.
 Available Blender primitives:
 - bpy.ops.mesh.primitive_cube_add(size, location, rotation)
@@ -84,7 +77,7 @@ Available Blender primitives:
 - bpy.ops.mesh.primitive_torus_add(major_radius, minor_radius, location, rotation)
 - bpy.ops.mesh.primitive_plane_add(size, location, rotation)
 
-Respond with a JSON array of components. Each component must be:
+Respond with a JSON object of the form {"components": [...]}, where each component must be:
 {
   "name": "component_name",
   "operations": [
@@ -103,115 +96,364 @@ Respond with a JSON array of components. Each component must be:
     …
   ]
 }
-Important:
-1. The root of the response must be a JSON _array_ of component‐objects.
-2. Each component‐object must have `"name"` and `"operations"`.
-3. Each operation must have `"operation"`, `"params"`, and `"transform"`.
-4. Use only primitives listed above.
-5. Do not return any extra keys.
-        """.strip()
-
-        client = openai.OpenAI(api_key=self.api_key)
-        response = client.chat.completions.create(
-            model="gpt-4",
+""".strip()
+
+_VEC3_SCHEMA = {"type": "array", "items": {"type": "number"}}
+
+# Size parameters each primitive takes; location/rotation/scale live in "transform"
+_PRIMITIVE_PARAMS = {
+    "bpy.ops.mesh.primitive_cube_add": ["size"],
+    "bpy.ops.mesh.primitive_cylinder_add": ["radius", "depth"],
+    "bpy.ops.mesh.primitive_uv_sphere_add": ["radius"],
+    "bpy.ops.mesh.primitive_cone_add": ["radius1", "radius2", "depth"],
+    "bpy.ops.mesh.primitive_torus_add": ["major_radius", "minor_radius"],
+    "bpy.ops.mesh.primitive_plane_add": ["size"],
+}
+
+def _operation_schema(operation: str, params: List[str]) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {
+            "operation": {"type": "string", "enum": [operation]},
+            "params": {
+                "type": "object",
+                "properties": {name: {"type": "number"} for name in params},
+                "required": params,
+                "additionalProperties": False,
+            },
+            "transform": {
+                "type": "object",
+                "properties": {"location": _VEC3_SCHEMA, "rotation": _VEC3_SCHEMA, "scale": _VEC3_SCHEMA},
+                "required": ["location", "rotation", "scale"],
+                "additionalProperties": False,
+            },
+        },
+        "required": ["operation", "params", "transform"],
+        "additionalProperties": False,
+    }
+
+_COMPONENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "operations": {
+            "type": "array",
+            "items": {"anyOf": [_operation_schema(op, params) for op, params in _PRIMITIVE_PARAMS.items()]},
+        },
+    },
+    "required": ["name", "operations"],
+    "additionalProperties": False,
+}
+
+# Structured-output formats: the API constrains decoding to these schemas, so
+# responses always parse and every operation is one of the primitives above
+_COMPONENTS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "primitive_components",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"components": {"type": "array", "items": _COMPONENT_SCHEMA}},
+            "required": ["components"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+_CLASSIFIED_COMPONENTS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "classified_primitive_components",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "classification": {"type": "string", "enum": ["pass", "does not pass"]},
+                "explanation": {"type": "string"},
+                "components": {"type": "array", "items": _COMPONENT_SCHEMA},
+            },
+            "required": ["classification", "explanation", "components"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+_ROWS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "primitive_component_rows",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "rows": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "row": {"type": "integer"},
+                            "classification": {"type": "string", "enum": ["pass", "does not pass"]},
+                            "components": {"type": "array", "items": _COMPONENT_SCHEMA},
+                        },
+                        "required": ["row", "classification", "components"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["rows"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+# Appended to _SYSTEM_PROMPT_PRIMITIVES when one request both classifies and generates
+_CLASSIFY_INSTRUCTIONS: Final[str] = """
+Before converting, decide whether the description is an indoor piece of furniture, judging its
+use context and physical form rather than keywords.
+Instead of a bare {"components": [...]} object, respond with a JSON object of the form
+{"classification": "pass" or "does not pass", "explanation": "<one sentence>", "components": [...]}
+Use an empty "components" array when the classification is "does not pass".
+""".strip()
+
+# Appended to _SYSTEM_PROMPT_PRIMITIVES when several prompts share one request
+_BATCH_INSTRUCTIONS: Final[str] = """
+You will receive several numbered rows, each holding one furniture description.
+For every row, first decide whether it describes an indoor piece of furniture, then convert it as described above.
+Instead of a single {"components": [...]} object, respond with a JSON object of the form {"rows": [...]}
+holding exactly one element per input row:
+{"row": <row number>, "classification": "pass" or "does not pass", "components": [...]}
+Use an empty "components" array for rows that do not pass.
+""".strip()
+
+def _iter_components(deltas: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally scan a streamed {"components": [...]} response and yield each
+    component object as soon as its closing brace arrives, so only one component
+    is ever buffered.
+    """
+    depth = 0
+    in_string = escaped = collecting = False
+    buffer = []
+    for delta in deltas:
+        for ch in delta:
+            if collecting:
+                buffer.append(ch)
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+                continue
+
+            if ch == '"':
+                in_string = True
+            elif ch in "{[":
+                # Depth 2 is inside the top-level object's "components" array
+                if ch == "{" and depth == 2:
+                    buffer = ["{"]
+                    collecting = True
+                depth += 1
+            elif ch in "}]":
+                depth -= 1
+                if ch == "}" and depth == 2 and collecting:
+                    collecting = False
+                    text = "".join(buffer)
+                    try:
+                        yield _json.loads(text)
+                    except json.JSONDecodeError:
+                        print("ERROR: Failed to parse a component from the OpenAI response.")
+                        print("Raw component was:\n", text)
+                        raise
+
+class DirectPrimitiveGenerator:
+    """
+    -------------
+    DRIVER SCRIPT
+    -------------
+    1) Classify the prompt via FurnitureClassifier.
+    2) Call OpenAI to get a JSON spec for primitives.
+    3) Write that JSON to disk.
+    4) Launch Blender in background, running `new_blendrtojson.py -- <json_path>`.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        force_llm_classify: bool = False,
+        two_stage: bool = False,
+        blender_workers: int = max(1, (os.cpu_count() or 2) // 2),
+    ):
+        self.api_key = api_key
+        self.model = "gpt-4o-2024-08-06"
+        self.classifier = FurnitureClassifier(api_key)
+        # Send every prompt to the LLM classifier, bypassing quick_classify (for evaluation runs)
+        self.force_llm_classify = force_llm_classify
+        # Classify and generate with separate requests instead of one combined request
+        self.two_stage = two_stage
+        # Shared with the classifier, so every request reuses the same pooled connections
+        self.client = shared_client(api_key)
+        # Runs the independent classifier and primitive requests side by side
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        # Long-lived Blender processes, created on first use (see agents/blender_process.py).
+        # Half the cores by default, since Blender is multithreaded itself
+        self.blender_workers = blender_workers
+        self._pool: Optional[blender_process.WorkerPool] = None
+        self._pool_lock = threading.Lock()
+
+    @_cache.cached(
+        "direct_primitives",
+        key=lambda self, prompt: self.model + _SYSTEM_PROMPT_PRIMITIVES + _cache.normalize(prompt)
+    )
+    def generate_primitives(self, prompt: str) -> list:
+        """
+        Call OpenAI to get a JSON array of component specs.
+        Each component is a dict with:
+          - "name": str
+          - "operations": list of { "operation": str, "params": {...}, "transform": {...} }
+        The response is constrained to _COMPONENTS_FORMAT and streamed, so each
+        component is available as soon as its closing brace arrives.
+        """
+        stream = self.client.chat.completions.create(
+            model=self.model,
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": _SYSTEM_PROMPT_PRIMITIVES},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.1
+            temperature=0.1,
+            response_format=_COMPONENTS_FORMAT,
+            stream=True
         )
+        deltas = (chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
 
-        content = response.choices[0].message.content
-        try:
-            specs = json.loads(content)
-        except json.JSONDecodeError as e:
-            print("ERROR: Failed to parse JSON from OpenAI response.")
-            print("Raw content was:\n", content)
-            raise
+        components = []
+        for component in _iter_components(deltas):
+            logger.debug("Received component: %s", component["name"])
+            components.append(component)
 
-        if not isinstance(specs, list):
-            raise ValueError(f"Expected a JSON array at top level, but got {type(specs)}")
-
-        # Validate each spec
-        validated = []
-        for spec in specs:
-            if not isinstance(spec, dict):
-                raise ValueError(f"Each element of the array must be a dict, but got {type(spec)}")
-            if "name" not in spec:
-                raise ValueError(f"A component is missing the 'name' field: {spec}")
-            if "operations" not in spec or not isinstance(spec["operations"], list):
-                raise ValueError(f"A component is missing 'operations' array: {spec}")
-
-            # Filter each operation
-            ops = []
-            for op in spec["operations"]:
-                if not isinstance(op, dict):
-                    print("WARNING: Skipping malformed op (not a dict):", op)
-                    continue
-                if "operation" not in op:
-                    print("WARNING: Skipping op with no 'operation' key:", op)
-                    continue
-                # Ensure transform has all three keys, even if user omitted them
-                transform = op.get("transform", {})
-                transform.setdefault("location", [0.0, 0.0, 0.0])
-                transform.setdefault("rotation", [0.0, 0.0, 0.0])
-                transform.setdefault("scale",    [1.0, 1.0, 1.0])
-
-                ops.append({
-                    "operation": op["operation"],
-                    "params": op.get("params", {}),
-                    "transform": transform
-                })
-
-            validated.append({
-                "name": spec["name"],
-                "operations": ops,
-                # If your spec includes materials, keep them too
-                **({"material": spec["material"]} if "material" in spec else {})
-            })
-
-        return validated
-
-    def save_json(self, specs: list, json_path: Path) -> None:
+        if not components:
+            raise ValueError("OpenAI response did not contain any components")
+        return components
+
+    @_cache.cached(
+        "direct_classified_primitives",
+        key=lambda self, prompt: self.model + _SYSTEM_PROMPT_PRIMITIVES + _CLASSIFY_INSTRUCTIONS + _cache.normalize(prompt)
+    )
+    def classify_and_generate(self, prompt: str) -> Tuple[str, str, list]:
+        """
+        Classify the prompt and generate its component specs in a single OpenAI call.
+        Returns (classification, explanation, specs); specs is empty when the
+        classification is "does not pass".
+        """
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": _SYSTEM_PROMPT_PRIMITIVES + "\n\n" + _CLASSIFY_INSTRUCTIONS},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            response_format=_CLASSIFIED_COMPONENTS_FORMAT
+        )
+        result = _json.loads(response.choices[0].message.content)
+        if result["classification"] == "pass" and not result["components"]:
+            raise ValueError("OpenAI response did not contain any components")
+        return result["classification"], result["explanation"], result["components"]
+
+    def generate_primitives_batch(self, prompts: List[str], partial: bool = False) -> List[Optional[Tuple[str, list]]]:
+        """
+        Classify and generate component specs for several prompts in one OpenAI call.
+        Returns one (classification, specs) pair per prompt, in order.
+        Raises ValueError if the response does not cover every row, unless `partial`
+        is set, in which case the missing rows are None.
+        """
+        response = self.client.chat.completions.create(**self._batch_request(prompts))
+        return self._parse_batch_rows(response.choices[0].message.content, len(prompts), partial)
+
+    def _batch_request(self, prompts: List[str]) -> Dict[str, Any]:
+        """Build the chat-completion request body for a row-marshaled batch of prompts"""
+        rows = "\n".join(f"{i}) {prompt}" for i, prompt in enumerate(prompts, 1))
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": _SYSTEM_PROMPT_PRIMITIVES + "\n\n" + _BATCH_INSTRUCTIONS},
+                {"role": "user", "content": "Rows:\n" + rows}
+            ],
+            "temperature": 0.1,
+            "response_format": _ROWS_FORMAT
+        }
+
+    def _parse_batch_rows(self, content: str, n_rows: int, partial: bool = False) -> List[Optional[Tuple[str, list]]]:
+        """Split a row-marshaled response into one (classification, specs) pair per row (None if missing and `partial`)"""
+        by_row = {row["row"]: row for row in _json.loads(content)["rows"]}
+        missing = [i for i in range(1, n_rows + 1) if i not in by_row]
+        if missing and not partial:
+            raise ValueError(f"Batch response is missing rows {missing}")
+
+        return [
+            (by_row[i]["classification"], by_row[i]["components"]) if i in by_row else None
+            for i in range(1, n_rows + 1)
+        ]
+
+    def submit_batch(self, prompts: List[str], out_jsonl: Path) -> List[Optional[Tuple[str, list]]]:
+        """
+        Classify and generate every prompt through the OpenAI Batch API, at half the
+        per-token price and outside the interactive rate limits. Blocks until the batch
+        finishes (up to 24h); rerunning after an interruption resumes the same batch.
+        Returns one (classification, specs) pair per prompt, or None for
+        prompts whose request or response failed.
+        """
+        requests = {f"row-{i}": self._batch_request([prompt]) for i, prompt in enumerate(prompts)}
+        contents = batch_api.run_batch(self.client, requests, out_jsonl)
+
+        rows = []
+        for i, prompt in enumerate(prompts):
+            content = contents.get(f"row-{i}")
+            try:
+                rows.append(self._parse_batch_rows(content, 1)[0] if content else None)
+            except (json.JSONDecodeError, ValueError) as e:
+                print(f"WARNING: Unusable batch result for '{prompt}': {e}")
+                rows.append(None)
+        return rows
+
+    def save_json(self, specs: list, json_path: Path, pretty: bool = False) -> None:
         """
-        Write `specs` to `json_path`. Overwrite any existing file.
+        Atomically write `specs` to `json_path`, replacing any existing file.
+        The file is only an intermediate hand-off to Blender, so it is written compactly
+        unless `pretty` is set (e.g. because the user asked for it with --output).
         """
         json_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(json_path, "w") as f:
-            json.dump(specs, f, indent=2)
+        if pretty:
+            _json.dump(specs, json_path, indent=True)
+        else:
+            _json.dump_iter(specs, json_path)
         print(f"✓ JSON written to: {json_path}")
 
     def run_blender(self, json_path: Path) -> Optional[Path]:
         """
-        Launch Blender in background, running `new_blendrtojson.py`.
+        Convert `json_path` with `new_blendrtojson.py` in one of the persistent Blender
+        workers, falling back to a one-off Blender process if the worker is unavailable.
+        Safe to call from several threads; each call gets its own worker.
         Return the resulting .blend path if successful, else None.
         """
-        blender_path = find_blender()
-        if not blender_path:
+        pool = self._get_pool()
+        if not pool:
             return None
 
         # Expand ~/ and make absolute
         json_path = Path(json_path).expanduser().resolve()
 
-        script_path = project_root / "primitive_builder" / "new_blendrtojson.py"
-        print(f"→ Passing JSON: {json_path}")
-        cmd = [
-            str(blender_path),
-            "--background",
-            "--python", str(script_path),
-            "--", str(json_path)
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        print(f"← Blender return code: {result.returncode}")
-        if result.stderr:
-            print("← Blender stderr:")
-            print(result.stderr)
-        if result.stdout:
-            print("← Blender stdout:")
-            print(result.stdout)
-
-        if result.returncode != 0:
-            print("ERROR: Blender failed. See stderr + stdout above.")
+        logger.debug("Passing JSON: %s", json_path)
+        with pool.worker() as worker:
+            returncode, tail = worker.run(json_path)
+        if returncode is None:
+            returncode, tail = blender_process.run_once(pool.blender_path, pool.script_path, json_path)
+        print(f"← Blender return code: {returncode}")
+
+        if returncode != 0:
+            print("ERROR: Blender failed. Last lines of output:")
+            print("".join(tail))
             return None
 
         blend_path = json_path.with_suffix(".blend")
@@ -221,10 +463,34 @@ Important:
 
         return blend_path
 
+    def _get_pool(self) -> Optional[blender_process.WorkerPool]:
+        """Return the Blender worker pool, or None if Blender is not installed"""
+        blender_path = find_blender()
+        if not blender_path:
+            return None
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = blender_process.WorkerPool(blender_path, _SCRIPT_PATH, self.blender_workers)
+            return self._pool
+
+    def prestart_blender(self) -> None:
+        """
+        Start a persistent Blender worker now, without giving it a job, so its
+        startup overlaps with the OpenAI requests instead of following them.
+        """
+        pool = self._get_pool()
+        if pool:
+            pool.start()
+
+    def close(self) -> None:
+        """Shut down the persistent Blender workers, if any were started"""
+        if self._pool:
+            self._pool.close()
+
     def generate(self, prompt: str, output: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
         """
         Full pipeline:
-         1) classify → reject if not furniture
+         1) classify → reject if not furniture (combined with step 2 unless two_stage)
          2) call OpenAI → validated JSON
          3) write JSON to disk
          4) call Blender → produce .blend
@@ -232,75 +498,274 @@ Important:
         """
         print("\n=== Starting DirectPrimitiveGenerator ===")
         print("Input prompt:", prompt)
+        # Stage durations in nanoseconds, emitted as one JSON line when the call ends
+        metrics = {}
+        start_ns = stage_ns = time.perf_counter_ns()
+
+        if output:
+            # Expand “~” immediately
+            out = Path(output).expanduser()
+            json_path = out.with_suffix(".json")
+        else:
+            # Unique per call so concurrent runs never overwrite each other's files
+            json_path = Path.home() / "Desktop" / "generated-assets" / f"primitives_{uuid.uuid4().hex[:8]}.json"
 
-        # 1) Classification
+        json_path = json_path.expanduser().resolve()  # ensure it’s absolute
+
+        # 0) Reuse a recent identical run if one is cached (not with --no-cache)
+        key = blend_cache.cache_key(
+            "direct", prompt, output, self.model, self.force_llm_classify, self.two_stage
+        )
+        cached = blend_cache.lookup(json_path, key) if _cache.is_enabled() else None
+        if cached:
+            print("✓ Cache hit, reusing:", cached[1])
+            _log_metrics(metrics, start_ns, "cache_hit")
+            return str(cached[0]), str(cached[1])
+
+        # Boot Blender in the background while the OpenAI requests are in flight;
+        # Popen returns immediately, so this costs nothing on the critical path
+        self.prestart_blender()
+
+        # 1) Classification: keywords first, then either one combined classify+generate
+        #    request or (--two-stage) the classifier with the primitive request sent
+        #    speculatively alongside it
         print("\n1) Running classifier…")
-        classification, explanation = self.classifier.classify(prompt)
-        print("  Classification:", classification)
+        local = None if self.force_llm_classify else quick_classify(prompt)
+        specs, specs_future = None, None
+        if local:
+            classification, explanation = local
+        elif self.two_stage:
+            specs_future = self.executor.submit(self.generate_primitives, prompt)
+            classification, explanation = self.classifier.classify(prompt)
+        else:
+            classification, explanation, specs = self.classify_and_generate(prompt)
+        metrics["classify_ns"], stage_ns = time.perf_counter_ns() - stage_ns, time.perf_counter_ns()
+        print("  Classification:", classification, "(keyword match)" if local else "")
         print("  Explanation:", explanation)
-        if classification.lower().strip() == "not a furniture":
+        if classification.lower().strip() in ("not a furniture", "does not pass"):
             print("  ❌ Rejected: not a piece of furniture. Stopping.")
+            if specs_future:
+                specs_future.cancel()
+            _log_metrics(metrics, start_ns, "rejected")
             return None, None
 
-        # 2) Call OpenAI → JSON specs
+        # 2) Call OpenAI → JSON specs (already in hand after a combined request)
         print("\n2) Calling OpenAI to generate primitives…")
         try:
-            specs = self.generate_primitives(prompt)
+            if specs is None:
+                specs = specs_future.result() if specs_future else self.generate_primitives(prompt)
         except Exception as e:
             print("ERROR: Could not generate primitives via OpenAI.")
             raise
 
-        print("  → Received specs (validated):")
-        print(json.dumps(specs, indent=2)[:500], "\n…")
+        metrics["primitives_ns"], stage_ns = time.perf_counter_ns() - stage_ns, time.perf_counter_ns()
+        print(f"  → Received {len(specs)} validated component specs")
 
         # 3) Write JSON file
-        if output:
-            # Expand “~” immediately
-            out = Path(output).expanduser()
-            json_path = out.with_suffix(".json")
-        else:
-            json_path = Path.home() / "Desktop" / "generated-assets" / "primitives.json"
-
-        json_path = json_path.expanduser().resolve()  # ensure it’s absolute
-
-        self.save_json(specs, json_path)
-        print(f"✓ JSON written to: {json_path}")
+        self.save_json(specs, json_path, pretty=bool(output))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s\n…", _json.dumps(specs, indent=True)[:500])
 
         # 4) Launch Blender
         print("\n4) Launching Blender to convert JSON → .blend…")
         blend_path = self.run_blender(json_path)
+        metrics["blender_ns"] = time.perf_counter_ns() - stage_ns
         if blend_path:
             print("✓ Blender file created at:", blend_path)
+            if _cache.is_enabled():
+                blend_cache.store(json_path, blend_path, key)
+            _log_metrics(metrics, start_ns, "ok")
             return str(json_path), str(blend_path)
         else:
+            _log_metrics(metrics, start_ns, "blender_failed")
             return str(json_path), None
 
+    def generate_batch(
+        self, prompts: List[str], output_dir: Optional[str] = None, batch_size: int = 8
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Generate many prompts with one OpenAI call per `batch_size` prompts.
+        Row i is written to `<output_dir>/prompt_<i>.json` (and `.blend`).
+        Prompts whose rows are missing from a batch response (all of them, if it
+        cannot be parsed) fall back to running `generate` one at a time; rows
+        the response did cover are used as they are.
+        Results are returned in the same order as `prompts`.
+        """
+        if output_dir:
+            out_dir = Path(output_dir).expanduser().resolve()
+        else:
+            out_dir = Path.home() / "Desktop" / "generated-assets"
+
+        # Rows are converted by the Blender worker pool as soon as a worker is free,
+        # while the next batch's OpenAI request is already in flight
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.blender_workers) as converters:
+            for start in range(0, len(prompts), batch_size):
+                chunk = prompts[start:start + batch_size]
+                print(f"\n=== Batch {start // batch_size + 1}: prompts {start}–{start + len(chunk) - 1} ===")
+                try:
+                    rows = self.generate_primitives_batch(chunk, partial=True)
+                except (json.JSONDecodeError, ValueError) as e:
+                    print(f"WARNING: Batch response unusable ({e}); retrying its prompts one at a time.")
+                    rows = [None] * len(chunk)
+                missing = [start + offset for offset, row in enumerate(rows) if row is None]
+                if missing and len(missing) < len(chunk):
+                    print(f"WARNING: Batch response is missing prompts {missing}; retrying only those.")
+
+                for offset, prompt in enumerate(chunk):
+                    json_path = out_dir / f"prompt_{start + offset}.json"
+                    if rows[offset] is None:
+                        futures.append(converters.submit(self.generate, prompt, str(json_path)))
+                    else:
+                        futures.append(converters.submit(self._write_row, prompt, rows[offset], json_path))
+
+            return [future.result() for future in futures]
+
+    def generate_batch_api(
+        self, prompts: List[str], output_dir: Optional[str] = None
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Like `generate_batch`, but sends the prompts through the OpenAI Batch API.
+        Meant for offline dataset builds where latency does not matter.
+        """
+        if output_dir:
+            out_dir = Path(output_dir).expanduser().resolve()
+        else:
+            out_dir = Path.home() / "Desktop" / "generated-assets"
+
+        rows = self.submit_batch(prompts, out_dir / "batch_requests.jsonl")
+        with ThreadPoolExecutor(max_workers=self.blender_workers) as converters:
+            futures = [
+                converters.submit(self._write_row, prompt, row, out_dir / f"prompt_{i}.json")
+                for i, (prompt, row) in enumerate(zip(prompts, rows))
+            ]
+            return [future.result() for future in futures]
+
+    def _write_row(
+        self, prompt: str, row: Optional[Tuple[str, list]], json_path: Path
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Save one batch row's specs and convert them with Blender"""
+        if row is None:
+            print(f"  ✗ No usable specs for '{prompt}'.")
+            return None, None
+
+        classification, specs = row
+        if classification.lower().strip() == "does not pass":
+            print(f"  ❌ Rejected: '{prompt}' is not a piece of furniture.")
+            return None, None
+
+        self.save_json(specs, json_path)
+        blend_path = self.run_blender(json_path)
+        return str(json_path), str(blend_path) if blend_path else None
+
+    def generate_many(
+        self, jobs: List[Tuple[str, Optional[str]]], max_concurrency: int = 4
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Run `generate` for several (prompt, output) pairs concurrently.
+        `max_concurrency` bounds the number of pipelines, and so the number of
+        in-flight OpenAI requests, at any one time.
+        Results are returned in the same order as `jobs`.
+        """
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            futures = [pool.submit(self.generate, prompt, output) for prompt, output in jobs]
+            return [future.result() for future in futures]
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate 3D furniture from a text description via Blender primitives"
     )
-    parser.add_argument("prompt", type=str, help="Furniture description (e.g. 'a wooden stool')")
+    parser.add_argument(
+        "prompt",
+        type=str,
+        nargs="+",
+        help="Furniture description (e.g. 'a wooden stool'); several prompts run in batch mode"
+    )
     parser.add_argument(
         "--output",
         type=str,
         help="Where to write the result; if ends in .blend, JSON will be .json, .blend will be .blend",
         default=None
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=8,
+        help="Prompts per OpenAI request in batch mode; in batch mode --output is a directory"
+    )
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="Submit the prompts through the OpenAI Batch API (cheaper, may take up to 24h)"
+    )
+    parser.add_argument(
+        "--blender-workers",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 2),
+        help="Blender processes used to convert batch rows in parallel (default: half the CPU cores)"
+    )
     parser.add_argument(
         "--json-only",
         action="store_true",
         help="Only write the JSON file; skip Blender step"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call OpenAI instead of reusing cached classifier/primitive results"
+    )
+    parser.add_argument(
+        "--force-llm-classify",
+        action="store_true",
+        help="Classify every prompt with the LLM, even when a keyword match would decide it"
+    )
+    parser.add_argument(
+        "--two-stage",
+        action="store_true",
+        help="Classify and generate with separate OpenAI requests instead of one combined request"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print debug output"
+    )
     args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    _cache.set_enabled(not args.no_cache)
 
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         print("ERROR: OPENAI_API_KEY not set in environment")
         sys.exit(1)
 
-    driver = DirectPrimitiveGenerator(api_key)
+    driver = DirectPrimitiveGenerator(
+        api_key,
+        force_llm_classify=args.force_llm_classify,
+        two_stage=args.two_stage,
+        blender_workers=args.blender_workers
+    )
+    try:
+        run(driver, args)
+    finally:
+        driver.close()
+
+def run(driver: DirectPrimitiveGenerator, args: argparse.Namespace) -> None:
+    if len(args.prompt) > 1 or args.batch_api:
+        try:
+            if args.batch_api:
+                results = driver.generate_batch_api(args.prompt, args.output)
+            else:
+                results = driver.generate_batch(args.prompt, args.output, args.batch_size)
+        except Exception:
+            print("ERROR: Batch generation crashed. See traceback above.")
+            sys.exit(1)
+        print("\nBatch done!")
+        for prompt, (json_path, blend_path) in zip(args.prompt, results):
+            print(f"→ '{prompt}': JSON {json_path}, BLEND {blend_path}")
+        return
+
     try:
-        json_path, blend_path = driver.generate(args.prompt, args.output)
+        json_path, blend_path = driver.generate(args.prompt[0], args.output)
     except Exception:
         print("ERROR: Generation pipeline crashed. See traceback above.")
         sys.exit(1)
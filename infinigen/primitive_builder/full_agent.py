@@ -2,57 +2,124 @@ import os
 from pathlib import Path
 import sys
 import openai
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, List, Tuple
 import argparse
-import json
+import copy
+import logging
 import bpy
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import importlib.util
 from importlib import import_module
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
-sys.path.append(str(project_root))
+# primitive_builder.pth (see install_pth.py) normally puts the repo root on sys.path already
+if importlib.util.find_spec("primitive_builder") is None:
+    sys.path.insert(0, str(project_root))
 
 from primitive_builder.agents.classifier import FurnitureClassifier
 from primitive_builder.agents.decomposer import SemanticDecomposer
 from primitive_builder.agents.primitive_calls import PrimitiveGenerator
 from primitive_builder.agents.blender_generator import BlenderGenerator
 from primitive_builder.agents.validator import ComponentValidator
+from primitive_builder.agents import _cache, _json
+from primitive_builder.agents._client import shared_client
+
+logger = logging.getLogger(__name__)
 
 class FurnitureGenerator:
-    def __init__(self, api_key: str, output_path: Optional[str] = None):
-        self.classifier = FurnitureClassifier(api_key)
-        self.decomposer = SemanticDecomposer(api_key)
-        self.primitive_gen = PrimitiveGenerator(api_key)
-        self.validator = ComponentValidator(api_key)
+    def __init__(self, api_key: str, output_path: Optional[str] = None, pretty: bool = False):
+        # One client (and so one keep-alive connection pool) for every agent in the pipeline
+        self.client = shared_client(api_key)
+        self.classifier = FurnitureClassifier(api_key, client=self.client)
+        self.decomposer = SemanticDecomposer(api_key, client=self.client)
+        self.primitive_gen = PrimitiveGenerator(api_key, client=self.client)
+        self.validator = ComponentValidator(api_key, client=self.client)
         self.blender_gen = BlenderGenerator()
         self.output_path = output_path
+        # Indent the saved JSON for human readers; compact otherwise
+        self.pretty = pretty
+        # Runs independent LLM requests (classifier/decomposer, validator/pre-validation file) side by side
+        self.executor = ThreadPoolExecutor(max_workers=2)
 
     def generate(self, prompt: str, pre_validate_path: Optional[str] = None, post_validate_path: Optional[str] = None, validate: bool = True) -> str:
         """Generate 3D furniture from text description"""
         print("\n=== Starting Generation Pipeline ===")
         print(f"Input Prompt: '{prompt}'")
         
-        # Step 1: Classification
+        # Step 1: Classification, with the decomposition requested speculatively alongside it
         print("\n1. Running Classifier...")
+        components_future = self.executor.submit(self.decomposer.decompose, prompt)
         classification, explanation = self.classifier.classify(prompt)
         print(f"Classification Result: {classification}")
         print(f"Explanation: {explanation}")
         
         if classification == "does not pass":
             print("Rejected: Generation stopped.")
+            components_future.cancel()
             return None
 
         # Step 2: Semantic Decomposition
         print("\n2. Running Semantic Decomposition...")
-        components = self.decomposer.decompose(prompt)
-        print("Decomposed Components:")
-        print(json.dumps(components, indent=2))
+        components = components_future.result()
+        logger.debug("Decomposed Components: %s", components)
         
         # Step 3: Generate Primitive Calls
         print("\n3. Generating Primitive Specifications...")
         primitive_specs = self.primitive_gen.generate(components)
-        print("Generated Specifications:")
-        print(json.dumps(primitive_specs, indent=2))
+        logger.debug("Generated Specifications: %s", primitive_specs)
+        
+        return self._create_files(primitive_specs, pre_validate_path, post_validate_path, validate)
+
+    def generate_many(self, prompts: List[str], pre_validate_path: str, post_validate_path: str, validate: bool = True, batch_size: int = 8) -> List[Optional[str]]:
+        """
+        Generate several prompts, sending each agent one request per `batch_size` prompts
+        instead of one per prompt. Prompt i's files go in an `<i>/` subdirectory next to
+        the given pre/post-validation paths. Returns one blend path (or None) per prompt.
+        """
+        pre_path = Path(pre_validate_path).expanduser()
+        post_path = Path(post_validate_path).expanduser()
+        results = []
+        for start in range(0, len(prompts), batch_size):
+            chunk = prompts[start:start + batch_size]
+            print(f"\n=== Generating prompts {start + 1}-{start + len(chunk)} of {len(prompts)} ===")
+
+            # Classification and (speculative) decomposition for the whole chunk, side by side
+            components_future = self.executor.submit(self.decomposer.decompose_batch, chunk)
+            classifications = self.classifier.classify_batch(chunk)
+            components_list = components_future.result()
+
+            accepted = [
+                i for i, (classification, explanation) in enumerate(classifications)
+                if classification != "does not pass" and components_list[i]
+            ]
+            for i, (classification, explanation) in enumerate(classifications):
+                print(f"[{start + i}] '{chunk[i]}': {classification} - {explanation}")
+
+            specs_list = self.primitive_gen.generate_batch([components_list[i] for i in accepted]) if accepted else []
+            specs_by_index = dict(zip(accepted, specs_list))
+
+            for i, prompt in enumerate(chunk):
+                if i not in specs_by_index:
+                    results.append(None)
+                    continue
+                index = start + i
+                results.append(self._create_files(
+                    specs_by_index[i],
+                    str(pre_path.parent / str(index) / pre_path.name),
+                    str(post_path.parent / str(index) / post_path.name),
+                    validate
+                ))
+        return results
+
+    def _create_files(self, primitive_specs: List[Dict], pre_validate_path: Optional[str], post_validate_path: Optional[str], validate: bool) -> str:
+        """Steps 4-6: build the pre-validation file, then validate and build the post-validation file"""
+        # The validator only needs the specs (no bpy), so its LLM request runs while the
+        # pre-validation file is built; it gets a copy because it edits components in place
+        validated_future = None
+        if validate:
+            validated_future = self.executor.submit(self.validator.validate_and_fix, copy.deepcopy(primitive_specs))
         
         # Step 4: Save pre-validation file
         print("\n4. Creating Pre-validation Blender File...")
@@ -65,16 +132,17 @@ class FurnitureGenerator:
         # Step 5: Validate and save post-validation file if enabled
         if validate:
             print("\n5. Validating Component Connections...")
-            validated_components = self.validator.validate_and_fix(primitive_specs)
-            print("Validated Components:")
-            print(json.dumps(validated_components, indent=2))
+            validated_components = validated_future.result()
+            logger.debug("Validated Components: %s", validated_components)
             
             # Save validated components to JSON file
             validated_json_path = Path(post_validate_path).expanduser()
             validated_json_path.parent.mkdir(parents=True, exist_ok=True)
             validated_json_path = validated_json_path.parent / "validated_components.json"
-            with open(validated_json_path, 'w') as f:
-                json.dump(validated_components, f, indent=2)
+            if self.pretty:
+                _json.dump(validated_components, validated_json_path, indent=True)
+            else:
+                _json.dump_iter(validated_components, validated_json_path)
             print(f"Saved validated components to: {validated_json_path}")
             
             print("\n6. Creating Post-validation Blender File...")
@@ -87,6 +155,50 @@ class FurnitureGenerator:
         
         return pre_validate_blend
 
+@lru_cache(maxsize=128)
+def _split_material_path(path: str) -> Tuple[str, str]:
+    """Split 'package.module.function' into ('package.module', 'function')"""
+    module_path, _, function_name = path.rpartition('.')
+    return module_path, function_name
+
+@lru_cache(maxsize=128)
+def _resolve_material_fn(path: str) -> Tuple[Optional[Callable], Optional[Exception]]:
+    """
+    Import the material function named by a dotted path. Returns (function, None), or
+    (None, error) if it cannot be resolved, so failing paths are cached too and are
+    not re-imported for every component that uses them.
+    """
+    module_path, function_name = _split_material_path(path)
+    try:
+        return getattr(import_module(module_path), function_name), None
+    except (ImportError, AttributeError) as e:
+        return None, e
+
+# Materials already built, keyed by (path, params), so objects with identical material
+# specs share one datablock instead of each building its own shader graph
+_materials: Dict[Tuple, "bpy.types.Material"] = {}
+
+def _material_key(material_info) -> Optional[Tuple]:
+    """Cache key for a material spec, or None if its params are not hashable"""
+    try:
+        key = (material_info['path'], tuple(sorted(material_info.get('params', {}).items())))
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+def _cached_material(key):
+    material = _materials.get(key)
+    if material is None:
+        return None
+    try:
+        # Raises ReferenceError if the datablock has since been removed
+        material.name
+    except ReferenceError:
+        del _materials[key]
+        return None
+    return material
+
 def apply_material(obj, material_info):
     """Apply material to object based on material_info"""
     try:
@@ -95,39 +207,35 @@ def apply_material(obj, material_info):
         print(f"- Material params: {material_info.get('params', {})}")
         
         # Parse the material path
-        *module_parts, function_name = material_info['path'].split('.')
-        module_path = '.'.join(module_parts)
-        
-        # Add infinigen to Python path if needed
-        infinigen_root = Path(__file__).parent.parent.parent
-        if str(infinigen_root) not in sys.path:
-            sys.path.append(str(infinigen_root))
-        
-        try:
-            # Import the material module
-            material_module = import_module(module_path)
-            material_function = getattr(material_module, function_name)
-            
-            # Create material
-            material = material_function(**material_info.get('params', {}))
-            
-            # Apply to object
-            if obj.data.materials:
-                obj.data.materials[0] = material
-            else:
-                obj.data.materials.append(material)
-            
-            print(f"✓ Successfully applied {function_name} material to {obj.name}")
-            return True
-            
-        except ImportError as e:
-            print(f"✗ Failed to import material module: {e}")
+        module_path, function_name = _split_material_path(material_info['path'])
+        
+        # Import the material module (cached per distinct path, failures included)
+        material_function, error = _resolve_material_fn(material_info['path'])
+        if isinstance(error, ImportError):
+            print(f"✗ Failed to import material module: {error}")
             print(f"  Module path attempted: {module_path}")
             return False
-        except AttributeError as e:
-            print(f"✗ Failed to find material function: {e}")
+        if isinstance(error, AttributeError):
+            print(f"✗ Failed to find material function: {error}")
             print(f"  Function attempted: {function_name}")
             return False
+        
+        # Create material, or reuse the one built for an identical spec
+        key = _material_key(material_info)
+        material = _cached_material(key) if key is not None else None
+        if material is None:
+            material = material_function(**material_info.get('params', {}))
+            if key is not None:
+                _materials[key] = material
+        
+        # Apply to object
+        if obj.data.materials:
+            obj.data.materials[0] = material
+        else:
+            obj.data.materials.append(material)
+        
+        print(f"✓ Successfully applied {function_name} material to {obj.name}")
+        return True
             
     except Exception as e:
         print(f"✗ Error applying material: {e}")
@@ -170,10 +278,13 @@ def create_object(components):
         if created_objects:
             # Join objects if needed
             if len(created_objects) > 1:
-                bpy.context.view_layer.objects.active = created_objects[0]
-                for obj in created_objects[1:]:
-                    obj.select_set(True)
-                bpy.ops.object.join()
+                # Hand the join its active/selected objects directly instead of
+                # toggling selection on each object (one depsgraph update per call)
+                with bpy.context.temp_override(
+                    active_object=created_objects[0],
+                    selected_editable_objects=created_objects
+                ):
+                    bpy.ops.object.join()
             
             print(f"\n✓ Successfully created object with {len(components)} components")
             return created_objects[0]
@@ -187,20 +298,38 @@ def create_object(components):
 
 def main():
     parser = argparse.ArgumentParser(description='Generate 3D furniture from text description')
-    parser.add_argument('prompt', type=str, help='Description of the furniture to generate')
+    parser.add_argument('prompt', type=str, nargs='+', help='Description of the furniture to generate; several prompts are generated in batches')
     parser.add_argument('pre_validate_path', type=str, help='Output path for pre-validation blend file')
     parser.add_argument('post_validate_path', type=str, help='Output path for post-validation blend file')
     parser.add_argument('--no-validate', action='store_true', help='Skip validation step')
+    parser.add_argument('--batch-size', type=int, default=8, help='Prompts per OpenAI request when several prompts are given')
+    parser.add_argument('--no-cache', action='store_true', help='Always call OpenAI instead of reusing cached classifier/decomposer results')
+    parser.add_argument('--pretty', action='store_true', help='Indent the saved validated_components.json')
+    parser.add_argument('--verbose', action='store_true', help='Print debug output, including full component specs')
     args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    _cache.set_enabled(not args.no_cache)
 
     api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
         print("Error: OPENAI_API_KEY environment variable not set")
         sys.exit(1)
 
-    generator = FurnitureGenerator(api_key)
+    generator = FurnitureGenerator(api_key, pretty=args.pretty)
+    if len(args.prompt) > 1:
+        blend_paths = generator.generate_many(
+            args.prompt,
+            pre_validate_path=args.pre_validate_path,
+            post_validate_path=args.post_validate_path,
+            validate=not args.no_validate,
+            batch_size=args.batch_size
+        )
+        for prompt, blend_path in zip(args.prompt, blend_paths):
+            print(f"\n'{prompt}': {blend_path or 'failed'}")
+        return
+
     blend_path = generator.generate(
-        args.prompt, 
+        args.prompt[0], 
         pre_validate_path=args.pre_validate_path,
         post_validate_path=args.post_validate_path,
         validate=not args.no_validate
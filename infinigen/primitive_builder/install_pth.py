@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Write `primitive_builder.pth` into the active site-packages directory so the
+repo root is on sys.path at interpreter start-up. With it installed, the agent
+scripts no longer need to patch sys.path themselves.
+
+Run once per environment:
+    python primitive_builder/install_pth.py
+"""
+import site
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+
+def main():
+    site_packages = Path(site.getsitepackages()[0])
+    pth_path = site_packages / "primitive_builder.pth"
+    pth_path.write_text(f"{project_root}\n")
+    print(f"✓ Wrote {pth_path} -> {project_root}")
+
+if __name__ == "__main__":
+    main()